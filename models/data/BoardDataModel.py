@@ -1,5 +1,7 @@
+import numpy
 from . import DatabaseConnection as DB
 from models.game.Board import Board
+from models.game import Symmetry
 from weka.core.dataset import Instance, Instances, Attribute
 import weka.core.converters as converters
 
@@ -10,9 +12,105 @@ categorical_dataset.class_is_last()
 continuous_dataset = converters.load_any_file("models/data/datasets/continuous_dataset_defn.arff")
 continuous_dataset.class_is_last()
 
+# tables recorded before boards were stored in their canonical orientation are merged the first time they are opened
+DB.upgrade()
+
+# WHERE clause matching a row of the board table.  Filled with the next player followed by the 81 cell values
+_KEY_QUERY_TEMPLATE = "WHERE next_player = %s " + "".join(
+    "AND p%s%s = %%s " % (row, col) for row in list(range(0, 9)) for col in list(range(0, 9)))
+
+
+def _cell_values(global_board):
+    # the 81 cell values of a board, starting from the top row: 1 for X, 2 for O, 0 for empty
+    representation = []
+    for i in list(range(0, 9)):
+        metarow = i//3
+        row = i % 3
+        for j in list(range(0, 9)):
+            metacol = j//3
+            col = j % 3
+            cell = global_board.board[metarow][metacol].check_cell(row, col)
+            if cell == Board.X:
+                representation.append(1)
+            elif cell == Board.O:
+                representation.append(2)
+            else: representation.append(0)
+    return representation
+
+
+def get_weka_instances(global_boards, categorical=False):
+    """
+    Converts a list of boards to a single weka.core.datasets.Instances object, so that they can be classified with one
+    call to the classifier (see classify_instances).  The instances match BoardDataModel.get_weka_instance (in the
+    canonical orientation the models are trained on), but no BoardDataModel (with its database scripts) is built
+
+    :param global_boards: list of models.game.GlobalBoard objects
+    :param categorical: boolean: use the categorical dataset when constructing the instances (default: False)
+    :return: a weka.core.datasets.Instances object with one instance per board, in order
+    """
+    dataset = categorical_dataset if categorical else continuous_dataset
+    instances = Instances.template_instances(dataset, len(global_boards))
+    for global_board in global_boards:
+        representation = list(Symmetry.canonicalize(_cell_values(global_board))[0])
+        next_player = Board.O if representation.count(1) > representation.count(2) else Board.X
+        weka_instance = Instance.create_instance(representation + [next_player, 5 if categorical else 0])
+        weka_instance.dataset = dataset
+        if categorical:
+            weka_instance.set_missing(weka_instance.class_index)
+        instances.add_instance(weka_instance)
+    return instances
+
+
+def classify_instances(classifier, instances):
+    """
+    Classifies every instance of a dataset.  Classifiers which support batch prediction (all of Weka's standard
+    classifiers) classify the whole dataset in one call across the JVM boundary instead of one call per instance
+
+    :param classifier: a weka.classifiers.Classifier
+    :param instances: a weka.core.datasets.Instances object
+    :return: list of the values classifier.classify_instance would return for the instances, in order
+    """
+    distributions = classifier.distributions_for_instances(instances) if classifier.is_batchpredictor else None
+    if distributions is None:
+        return [classifier.classify_instance(instance) for instance in instances]
+    if instances.class_attribute.is_nominal:
+        # the predicted class is the most probable one
+        return [float(numpy.argmax(distribution)) for distribution in distributions]
+    return [float(distribution[0]) for distribution in distributions]
+
+
+def score_boards(classifier, global_boards, categorical, to_score, default=None):
+    """
+    Scores boards with a Weka classifier, classifying all of them with one call into the JVM (see classify_instances).
+    This is the batched scoring shared by the Weka bots; each bot only supplies the conversion of the classifier's
+    output to a score
+
+    :param classifier: a weka.classifiers.Classifier
+    :param global_boards: list of models.game.GlobalBoard objects
+    :param categorical: boolean: use the categorical dataset when constructing the instances
+    :param to_score: function converting the classifier's output for a board (a class index or a numeric prediction)
+        to a score from the perspective of 'X'
+    :param default: optional classifier output to use for boards the classifier fails on.  If the batch fails, its
+        boards are classified one at a time to find them.  If None, errors are raised
+    :return: list of scores, one per board, in order
+    """
+    instances = get_weka_instances(global_boards, categorical)
+    try:
+        values = classify_instances(classifier, instances)
+    except Exception:
+        if default is None:
+            raise
+        values = []
+        for instance in instances:
+            try:
+                values.append(classifier.classify_instance(instance))
+            except Exception:
+                values.append(default)
+    return [to_score(value) for value in values]
+
 
 class BoardDataModel(object):
-    def __init__(self, global_board):
+    def __init__(self, global_board, representation=None):
         """ BoardDataModel class
 
         The BoardDataModel class encapsulates the low-level representation of an Ultimate Tic-Tac-Toe board in the database.
@@ -21,6 +119,8 @@ class BoardDataModel(object):
             and 0 indicates an empty cell
 
         The first 81 attributes list the values of the cells of the board starting from the top row.
+        Boards are stored in their canonical orientation (see models.game.Symmetry), so that the 8 rotated/mirrored
+        versions of a position share a single row and their win/loss/tie counts aggregate
         The 82nd attribute is an identifier for the player whose turn comes next
         Attribute 83 is the number of wins recorded for this board state
         Attribute 84 is the number of losses recorded for this board state
@@ -30,36 +130,24 @@ class BoardDataModel(object):
         low-level board tuples used by the database
 
         :param global_board: the models.game.GlobalBoard to represent
+        :param representation: optional list of the 81 cell values of global_board (1 for X, 2 for O, 0 for empty),
+            for callers which already maintain it, e.g. incrementally while replaying a game
         """
-        self.representation = []
-        x_count, o_count = 0, 0
-        for i in list(range(0, 9)):
-            metarow = i//3
-            row = i % 3
-            for j in list(range(0, 9)):
-                metacol = j//3
-                col = j % 3
-                cell = global_board.board[metarow][metacol].check_cell(row, col)
-                if cell == Board.X:
-                    self.representation.append(1)
-                    x_count += 1
-                elif cell == Board.O:
-                    self.representation.append(2)
-                    o_count += 1
-                else: self.representation.append(0)
+        if representation is None:
+            representation = _cell_values(global_board)
+        self.representation = representation
 
+        x_count, o_count = representation.count(1), representation.count(2)
         if x_count > o_count:
             self.next_player = Board.O
         else:
             self.next_player = Board.X
 
-        self.string_representation = ",".join(map(str, self.representation))
-        self.KEY_QUERY = "WHERE next_player = %s " % self.next_player
-        for row in list(range(0, 9)):
-            for col in list(range(0, 9)):
-                flattened_index = row * 9 + col
-                attr_query = "AND p%s%s = %s " % (row, col, self.representation[flattened_index])
-                self.KEY_QUERY += attr_query
+        # the database row uses the canonical orientation, and so do the Weka instances, because the models are trained
+        # on the rows of the database
+        self.canonical_representation = list(Symmetry.canonicalize(self.representation)[0])
+        self.string_representation = ",".join(map(str, self.canonical_representation))
+        self.KEY_QUERY = _KEY_QUERY_TEMPLATE % tuple([self.next_player] + self.canonical_representation)
         self.INSERT_SCRIPT = "INSERT OR IGNORE INTO board VALUES (%s, %s, 0, 0, 0); " % (self.string_representation, self.next_player)
         self.ADD_WIN_SCRIPT = "UPDATE board SET wins = wins + 1 %s ; " % self.KEY_QUERY
         self.ADD_LOSS_SCRIPT = "UPDATE board SET losses = losses + 1 %s ; " % self.KEY_QUERY
@@ -114,7 +202,8 @@ class BoardDataModel(object):
 
     def get_weka_instance(self, categorical=False):
         """
-        Converts this BoardDataModel to a weka.core.datasets.Instance object
+        Converts this BoardDataModel to a weka.core.datasets.Instance object.  Like the database row, the instance uses
+        the canonical orientation of the board
 
         Instance objects must be tied to some dataset.  The continuous version of our board dataset is used by default.
         If the 'categorical' param is True then the categorical dataset will be used.
@@ -124,12 +213,12 @@ class BoardDataModel(object):
         """
 
         if categorical:
-            instance_vector = self.representation + [self.next_player, 5]  # the five is a fake score attribute
+            instance_vector = self.canonical_representation + [self.next_player, 5]  # the five is a fake score attribute
             weka_instance = Instance.create_instance(instance_vector)
             weka_instance.dataset = categorical_dataset
             weka_instance.set_missing(weka_instance.class_index)
         else:
-            instance_vector = self.representation + [self.next_player, 0]  # the zero is a fake score attribute
+            instance_vector = self.canonical_representation + [self.next_player, 0]  # the zero is a fake score attribute
             weka_instance = Instance.create_instance(instance_vector)
             weka_instance.dataset = continuous_dataset
 
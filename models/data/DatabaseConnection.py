@@ -47,6 +47,9 @@ CREATE_BOARD_TABLE_SCRIPT = '''
     ) WITHOUT ROWID;
 '''
 
+# the version of the stored data, kept in sqlite's user_version.  See upgrade()
+SCHEMA_VERSION = 1
+
 _connection = None
 _connection_open = False
 
@@ -92,6 +95,24 @@ def execute(sqlscript):
     _connection.commit()
 
 
+def execute_many(statements):
+    """
+    Executes parameterized sql statements in a single transaction
+    :param statements: list of (sql, rows) pairs.  Each sql statement uses '?' placeholders and is run once per row of
+        parameters with executemany, so the values never have to be formatted into the sql
+    :return: None
+    """
+    global _connection, _connection_open
+    if not (_connection and _connection_open):
+        close()
+        init()
+
+    cursor = _connection.cursor()
+    for sql, rows in statements:
+        cursor.executemany(sql, rows)
+    _connection.commit()
+
+
 def close():
     """ Closes the connection until init, query, or execute is called again"""
     global _connection, _connection_open
@@ -108,5 +129,42 @@ def purge_boards(min_games):
     return execute(PURGE_SCRIPT)
 
 
+def upgrade():
+    """
+    Brings a database recorded by an older version of the application up to date.  Each step runs once per database
+    file.  Called by BoardDataModel when it is loaded (init runs before models.game, which the steps may need, can be
+    imported)
+        version 1: the board table is stored in canonical orientation (see merge_symmetric_boards)
+    :return: None
+    """
+    version = query("PRAGMA user_version").fetchone()[0]
+    if version < 1:
+        merge_symmetric_boards()
+    if version < SCHEMA_VERSION:
+        execute("PRAGMA user_version = %s" % SCHEMA_VERSION)
+
+
+def merge_symmetric_boards():
+    """
+    Rewrites the board table so that every position is stored once, in its canonical orientation.
+    The win, loss, and tie counts of the 8 rotated/mirrored versions of a position are added together.
+    Boards recorded by BoardDataModel are already canonical; upgrade() runs this once for tables recorded before that
+    """
+    from models.game import Symmetry
+
+    merged = {}
+    for row in query("SELECT * FROM board").fetchall():
+        cells, next_player, wins, losses, ties = row[0:81], row[81], row[82], row[83], row[84]
+        key = Symmetry.canonicalize(cells)[0] + (next_player,)
+        totals = merged.get(key, (0, 0, 0))
+        merged[key] = (totals[0] + wins, totals[1] + losses, totals[2] + ties)
+
+    cursor = _connection.cursor()
+    cursor.execute("DELETE FROM board")
+    cursor.executemany("INSERT INTO board VALUES (%s)" % ",".join(["?"] * 85),
+                       [key + totals for key, totals in merged.items()])
+    _connection.commit()
+
+
 # Call init when the module is loaded
 init()
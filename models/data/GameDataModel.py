@@ -1,7 +1,19 @@
 import datetime
 from . import DatabaseConnection as DB
-from . import BoardDataModel
-from models.game import GlobalBoard, Board
+from models.game import Board, Symmetry
+
+# parameterized statements for recording a game.  A board row is keyed by its 81 canonical cell values followed by
+# the next player (see BoardDataModel)
+_INSERT_GAME_SQL = "INSERT INTO game VALUES (?, ?, ?, ?)"
+_INSERT_BOARD_SQL = "INSERT OR IGNORE INTO board VALUES (%s, 0, 0, 0)" % ",".join(["?"] * 82)
+_KEY_CONDITION = " AND ".join(
+    ["p%s%s = ?" % (row, col) for row in list(range(0, 9)) for col in list(range(0, 9))] + ["next_player = ?"])
+_UPDATE_BOARD_SQL = {
+    'win': "UPDATE board SET wins = wins + 1 WHERE " + _KEY_CONDITION,
+    'loss': "UPDATE board SET losses = losses + 1 WHERE " + _KEY_CONDITION,
+    'tie': "UPDATE board SET ties = ties + 1 WHERE " + _KEY_CONDITION,
+}
+
 
 class GameDataModel(object):
     def __init__(self, game):
@@ -18,45 +30,43 @@ class GameDataModel(object):
             raise Exception("You cannot record the result of a game which has not been completed")
         self.game = game
 
-    def get_save_script(self):
-        script = "INSERT INTO game VALUES ('%s', '%s', '%s', '%s'); " \
-                             % (self.game.player1.player_type, self.game.player2.player_type,
-                                datetime.date.today().strftime("%d/%m/%Y"), len(self.game.moves))
-        # add each board state
-        board = GlobalBoard()
-        for move in self.game.moves:
-            board.make_move(move)
-            board_data = BoardDataModel(board)
-
-            if self.game.get_winner() == Board.X:
-                script += board_data.get_insert_script(type='win')
-            elif self.game.get_winner() == Board.O:
-                script += board_data.get_insert_script(type='loss')
-            else:
-                script += board_data.get_insert_script(type='tie')
+    def get_save_statements(self):
+        """
+        Builds the statements which record this game and the result of each of its board states
+        :return: list of (sql, rows) pairs for DatabaseConnection.execute_many.  The statements of several games can be
+            concatenated and executed together
+        """
+        game_row = (self.game.player1.player_type, self.game.player2.player_type,
+                    datetime.date.today().strftime("%d/%m/%Y"), len(self.game.moves))
+        if self.game.get_winner() == Board.X:
+            result_type = 'win'
+        elif self.game.get_winner() == Board.O:
+            result_type = 'loss'
+        else:
+            result_type = 'tie'
 
-        return script
+        board_rows = self._board_rows()
+        return [(_INSERT_GAME_SQL, [game_row]),
+                (_INSERT_BOARD_SQL, board_rows),
+                (_UPDATE_BOARD_SQL[result_type], board_rows)]
 
     def save(self):
-        # first save the game tuple
-        GAME_INSERT_SCRIPT = "INSERT INTO game VALUES ('%s', '%s', '%s', '%s'); " \
-                             % (self.game.player1.player_type, self.game.player2.player_type,
-                                datetime.date.today().strftime("%d/%m/%Y"), len(self.game.moves))
-        DB.execute(GAME_INSERT_SCRIPT)
-
-        # get the id of the inserted game tuple - TODO: probably no longer need this; may want to redo as many-to-many relation
-        # cursor = DB.query('SELECT max(rowid) FROM game')
-        # game_id = cursor.fetchone()[0]
-
-        # save each board state
-        board = GlobalBoard()
+        DB.execute_many(self.get_save_statements())
+
+    def _board_rows(self):
+        """
+        Computes the database key of the position after each move of the game: its canonical cell values (see
+        models.game.Symmetry) followed by the next player.
+        The 8 orientations of the position are updated one cell per move, so no board is replayed and no cell sequence
+        is rebuilt; the canonical orientation is the smallest of the 8 lists
+        :return: list of tuples of 82 values, in move order
+        """
+        orientations = [[0] * 81 for symmetry in range(0, 8)]
+        destinations = Symmetry.DESTINATIONS
+        rows = []
         for move in self.game.moves:
-            board.make_move(move)
-            board_data = BoardDataModel(board)
-
-            if self.game.get_winner() == Board.X:
-                board_data.add_win()
-            elif self.game.get_winner() == Board.O:
-                board_data.add_loss()
-            else:
-                board_data.add_tie()
+            for symmetry in range(0, 8):
+                orientations[symmetry][destinations[symmetry][move.abs_index]] = move.player
+            next_player = Board.O if move.player == Board.X else Board.X
+            rows.append(tuple(min(orientations)) + (next_player,))
+        return rows
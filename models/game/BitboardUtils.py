@@ -0,0 +1,68 @@
+"""
+The BitboardUtils module holds the precomputed masks used by the bitboard representation of LocalBoard and GlobalBoard.
+
+A 3x3 board is stored as a 9-bit integer mask per player.  Bit (row*3 + col) of a mask is set when the player holds
+the cell at (row, col).  The same layout is used for the meta-board, where bit (metarow*3 + metacol) is set when the
+player has captured the corresponding local board.
+"""
+
+FULL_MASK = 0x1FF  # all nine cells occupied
+
+# the eight winning lines of a 3x3 board: three rows, three columns, and the two diagonals
+WIN_LINES = (
+    0b000000111, 0b000111000, 0b111000000,
+    0b001001001, 0b010010010, 0b100100100,
+    0b100010001, 0b001010100
+)
+
+# LINES_THROUGH_CELL[i] is the tuple of winning lines that pass through cell i
+LINES_THROUGH_CELL = tuple(
+    tuple(line for line in WIN_LINES if line & (1 << cell)) for cell in range(0, 9)
+)
+
+# ABS_INDEX[meta][local] is the position on the 9x9 grid (abs_row*9 + abs_col) of cell 'local' of the local board 'meta'
+ABS_INDEX = tuple(
+    tuple(((meta // 3) * 3 + local // 3) * 9 + (meta % 3) * 3 + local % 3 for local in range(0, 9))
+    for meta in range(0, 9)
+)
+
+# MASK_BITS[mask] is the tuple of indices of the set bits of a 9-bit mask, in increasing order
+MASK_BITS = tuple(tuple(cell for cell in range(0, 9) if mask & (1 << cell)) for mask in range(0, FULL_MASK + 1))
+
+# POPCOUNT[mask] is the number of set bits of a 9-bit mask
+POPCOUNT = tuple(len(cells) for cells in MASK_BITS)
+
+
+def has_line_through(mask, cell):
+    """
+    Checks whether the given mask holds a complete line passing through the given cell
+    :param mask: 9-bit mask of the cells held by one player
+    :param cell: the index of the cell (0-8) that was most recently captured
+    :return: True if the mask contains a winning line through the cell, False otherwise
+    """
+    for line in LINES_THROUGH_CELL[cell]:
+        if mask & line == line:
+            return True
+    return False
+
+
+def has_line(mask):
+    """
+    Checks whether the given mask holds any complete line
+    :param mask: 9-bit mask of the cells held by one player
+    :return: True if the mask contains a winning line, False otherwise
+    """
+    for line in WIN_LINES:
+        if mask & line == line:
+            return True
+    return False
+
+
+# HAS_LINE[mask] is True if the 9-bit mask contains a complete line
+HAS_LINE = tuple(has_line(mask) for mask in range(0, FULL_MASK + 1))
+
+# WINNING_CELLS[mask] is the mask of the cells which would complete a line for a player holding the cells in 'mask'
+WINNING_CELLS = tuple(
+    sum(1 << cell for cell in range(0, 9) if not mask & (1 << cell) and has_line_through(mask | (1 << cell), cell))
+    for mask in range(0, FULL_MASK + 1)
+)
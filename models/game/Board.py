@@ -16,6 +16,7 @@ class Board(object):
         self.board_completed = False
         self.total_moves = 0
         self.winner = Board.EMPTY
+        self.index = 0  # base-3 index of the board's cells.  See the OutcomeTable module
 
     def make_move(self, move):
         """
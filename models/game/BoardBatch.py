@@ -0,0 +1,283 @@
+import numpy
+from .Board import Board
+from .LocalBoard import LocalBoard
+from .GlobalBoard import GlobalBoard
+from . import BitboardUtils as Bits
+from . import OutcomeTable
+
+# LOCAL_CELLS[meta][local] is the column of the cell array holding cell 'local' of local board 'meta'
+LOCAL_CELLS = numpy.array(Bits.ABS_INDEX, dtype=numpy.intp)
+# META_OF_CELL[abs_index] and LOCAL_OF_CELL[abs_index] locate a column of the cell array on the meta/local boards
+META_OF_CELL = numpy.zeros(81, dtype=numpy.intp)
+LOCAL_OF_CELL = numpy.zeros(81, dtype=numpy.intp)
+for _meta in range(0, 9):
+    META_OF_CELL[LOCAL_CELLS[_meta]] = _meta
+    LOCAL_OF_CELL[LOCAL_CELLS[_meta]] = numpy.arange(9)
+
+_POWERS = numpy.array(OutcomeTable.POWERS, dtype=numpy.int32)
+_OUTCOMES = numpy.array(OutcomeTable.OUTCOMES, dtype=numpy.int8)
+_WINNABLE = numpy.array(OutcomeTable.WINNABLE, dtype=numpy.int8)
+_HAS_LINE = numpy.array(Bits.HAS_LINE, dtype=bool)
+_META_BITS = 1 << numpy.arange(9)
+
+
+class BoardBatch(object):
+    """ Vectorized state for a batch of N Ultimate Tic-Tac-Toe games
+
+    The cells of all games are stored in an (N, 81) int8 array.  Column abs_row*9 + abs_col holds the cell at that
+    position of the 9x9 grid (the same ordering as Move.abs_index and the board table in the database).  A cell holds
+    Board.X (1), Board.O (2), or 0 if it is empty.
+
+    Per-game metadata is kept in parallel arrays:
+        next_player: (N,) the player to move, Board.X or Board.O
+        forced_board: (N,) the local board (metarow*3 + metacol) the next player must move in, or -1 for a wild card
+        local_winners: (N, 9) Board.X, Board.O, Board.CAT, or Board.EMPTY (still open) for each local board
+        winnable: (N, 9) OutcomeTable.WINNABLE flags of each local board
+        winner: (N,) Board.X or Board.O if the game has been won, otherwise Board.EMPTY
+        completed: (N,) True if the game is over (won, tied, or drawn because neither player can complete a meta-line)
+
+    Every operation works on the whole batch at once, which makes random playouts, self-play data generation and
+    feature extraction for the Weka models array operations instead of Python loops over GlobalBoard objects.
+    """
+    def __init__(self, size):
+        """
+        Creates a batch of 'size' empty boards with X to move
+        :param size: the number of games in the batch
+        """
+        self.size = size
+        self.cells = numpy.zeros((size, 81), dtype=numpy.int8)
+        self.next_player = numpy.full(size, Board.X, dtype=numpy.int8)
+        self.forced_board = numpy.full(size, -1, dtype=numpy.int8)
+        self.local_winners = numpy.full((size, 9), Board.EMPTY, dtype=numpy.int8)
+        self.winnable = numpy.full((size, 9), OutcomeTable.X_CAN_WIN | OutcomeTable.O_CAN_WIN, dtype=numpy.int8)
+        self.winner = numpy.full(size, Board.EMPTY, dtype=numpy.int8)
+        self.completed = numpy.zeros(size, dtype=bool)
+
+    @staticmethod
+    def from_boards(boards):
+        """
+        Builds a batch from a list of GlobalBoard objects
+        :param boards: list of GlobalBoards.  Each board's next_player and forced_board are carried over
+        :return: a new BoardBatch
+        """
+        batch = BoardBatch(len(boards))
+        for i, board in enumerate(boards):
+            for meta in range(0, 9):
+                local_board = board.board[meta // 3][meta % 3]
+                columns = LOCAL_CELLS[meta]
+                for local in Bits.MASK_BITS[local_board.x_mask]:
+                    batch.cells[i, columns[local]] = Board.X
+                for local in Bits.MASK_BITS[local_board.o_mask]:
+                    batch.cells[i, columns[local]] = Board.O
+                if local_board.board_completed:
+                    batch.local_winners[i, meta] = Board.CAT if local_board.cats_game else local_board.winner
+                batch.winnable[i, meta] = OutcomeTable.WINNABLE[local_board.index]
+            batch.next_player[i] = board.next_player
+            batch.forced_board[i] = -1 if board.forced_board is None else board.forced_board
+            batch.winner[i] = board.winner
+            batch.completed[i] = board.board_completed
+        return batch
+
+    @staticmethod
+    def repeat(board, size):
+        """
+        Builds a batch holding 'size' copies of the same position
+        :param board: the GlobalBoard to copy
+        :param size: the number of copies
+        :return: a new BoardBatch
+        """
+        single = BoardBatch.from_boards([board])
+        batch = BoardBatch(size)
+        batch.cells[:] = single.cells[0]
+        batch.next_player[:] = single.next_player[0]
+        batch.forced_board[:] = single.forced_board[0]
+        batch.local_winners[:] = single.local_winners[0]
+        batch.winnable[:] = single.winnable[0]
+        batch.winner[:] = single.winner[0]
+        batch.completed[:] = single.completed[0]
+        return batch
+
+    def copy(self):
+        """ :return: a new BoardBatch holding copies of this batch's arrays """
+        batch = BoardBatch.__new__(BoardBatch)
+        batch.size = self.size
+        batch.cells = self.cells.copy()
+        batch.next_player = self.next_player.copy()
+        batch.forced_board = self.forced_board.copy()
+        batch.local_winners = self.local_winners.copy()
+        batch.winnable = self.winnable.copy()
+        batch.winner = self.winner.copy()
+        batch.completed = self.completed.copy()
+        return batch
+
+    @staticmethod
+    def from_array(encoded):
+        """
+        Decodes a batch of positions from the bulk format produced by to_array
+        Any array-like of shape (N, 22) works, e.g. numpy.memmap(path, dtype=numpy.uint8).reshape(-1, 22) for large
+        position sets stored on disk
+
+        :param encoded: (N, GlobalBoard.ENCODED_SIZE) uint8 array
+        :return: a new BoardBatch
+        """
+        encoded = numpy.asarray(encoded, dtype=numpy.uint8)
+        batch = BoardBatch(len(encoded))
+        fields = (encoded[:, 0:21, None] >> numpy.array([0, 2, 4, 6], dtype=numpy.uint8)) & 3
+        batch.cells[:] = fields.reshape(len(encoded), 84)[:, 0:81]
+
+        forced_board = (encoded[:, 21] & 0x0F).astype(numpy.int8)
+        batch.forced_board[:] = numpy.where(forced_board == GlobalBoard._WILD_CARD_CODE, -1, forced_board)
+        batch.next_player[:] = numpy.where(encoded[:, 21] & 0x10, Board.O, Board.X)
+
+        local_indices = numpy.dot(batch.cells[:, LOCAL_CELLS].astype(numpy.int32), _POWERS)
+        batch.local_winners[:] = _OUTCOMES[local_indices]
+        batch.winnable[:] = _WINNABLE[local_indices]
+        batch.check_completed()
+        return batch
+
+    def to_array(self):
+        """
+        Encodes every position of the batch with the same layout as GlobalBoard.to_bytes
+        Row i of the result is equal to self.to_board(i).to_bytes()
+
+        :return: (N, GlobalBoard.ENCODED_SIZE) uint8 array
+        """
+        padded_cells = numpy.zeros((self.size, 84), dtype=numpy.uint8)
+        padded_cells[:, 0:81] = self.cells
+        fields = padded_cells.reshape(self.size, 21, 4)
+        encoded = numpy.zeros((self.size, GlobalBoard.ENCODED_SIZE), dtype=numpy.uint8)
+        encoded[:, 0:21] = fields[:, :, 0] | (fields[:, :, 1] << 2) | (fields[:, :, 2] << 4) | (fields[:, :, 3] << 6)
+        forced_board = numpy.where(self.forced_board < 0, GlobalBoard._WILD_CARD_CODE, self.forced_board)
+        encoded[:, 21] = forced_board | numpy.where(self.next_player == Board.O, 0x10, 0)
+        return encoded
+
+    def to_board(self, i):
+        """
+        Converts one game of the batch back into a GlobalBoard
+        :param i: the index of the game in the batch
+        :return: a new GlobalBoard
+        """
+        local_boards = []
+        for meta in range(0, 9):
+            local_cells = self.cells[i, LOCAL_CELLS[meta]]
+            x_mask = int(numpy.dot(local_cells == Board.X, 1 << numpy.arange(9)))
+            o_mask = int(numpy.dot(local_cells == Board.O, 1 << numpy.arange(9)))
+            local_boards.append(LocalBoard.from_masks(x_mask, o_mask))
+        grid = [local_boards[0:3], local_boards[3:6], local_boards[6:9]]
+        forced_board = int(self.forced_board[i])
+        return GlobalBoard(board=grid, next_player=int(self.next_player[i]),
+                           forced_board=None if forced_board < 0 else forced_board)
+
+    def to_boards(self):
+        """ Converts every game of the batch into a GlobalBoard """
+        return [self.to_board(i) for i in range(0, self.size)]
+
+    def legal_mask(self, games=None):
+        """
+        Computes the legal moves of every game in the batch
+        :param games: optional array of game indices to restrict the computation to
+        :return: (N, 81) bool array (one row per entry of 'games' if given).  Entry [i, abs_index] is True if the next
+            player of game i may move there
+        """
+        if games is None:
+            games = slice(None)
+        forced_board = self.forced_board[games]
+        open_cells = (self.local_winners[games] == Board.EMPTY)[:, META_OF_CELL]
+        in_forced_board = (forced_board[:, None] < 0) | (META_OF_CELL[None, :] == forced_board[:, None])
+        return (self.cells[games] == 0) & open_cells & in_forced_board & ~self.completed[games][:, None]
+
+    def count_legal_moves(self):
+        """ :return: (N,) array of the number of legal moves in each game """
+        return self.legal_mask().sum(axis=1)
+
+    def random_moves(self, rng=numpy.random, games=None):
+        """
+        Picks a legal move uniformly at random for every game in the batch
+        :param rng: a numpy.random.RandomState (or the numpy.random module)
+        :param games: optional array of game indices to restrict the choice to
+        :return: (N,) array of abs indices (one entry per entry of 'games' if given).  Games that are completed get -1
+        """
+        legal = self.legal_mask(games)
+        keys = rng.random_sample(legal.shape)
+        keys[~legal] = -1.0
+        moves = keys.argmax(axis=1)
+        moves[~legal.any(axis=1)] = -1
+        return moves
+
+    def apply(self, moves):
+        """
+        Makes one move in every game of the batch.  The moves are not checked for legality
+        :param moves: (N,) array of abs indices (abs_row*9 + abs_col) for the next player of each game.  A negative
+            entry skips that game, which is useful for games that are already completed
+        :return: None
+        """
+        moves = numpy.asarray(moves)
+        games = numpy.nonzero(moves >= 0)[0]
+        if len(games) > 0:
+            self._apply(games, moves[games])
+
+    def _apply(self, games, cells):
+        # makes the move at abs index cells[i] in game games[i]
+        players = self.next_player[games]
+        self.cells[games, cells] = players
+
+        # resolve the local boards that were played in
+        metas = META_OF_CELL[cells]
+        local_cells = self.cells[games[:, None], LOCAL_CELLS[metas]]
+        local_indices = numpy.dot(local_cells.astype(numpy.int32), _POWERS)
+        outcomes = _OUTCOMES[local_indices]
+        self.local_winners[games, metas] = outcomes
+        winnable = _WINNABLE[local_indices]
+        winnable_changed = winnable != self.winnable[games, metas]
+        self.winnable[games, metas] = winnable
+
+        # a player sent to a completed local board gets a wild card
+        targets = LOCAL_OF_CELL[cells]
+        target_open = self.local_winners[games, targets] == Board.EMPTY
+        self.forced_board[games] = numpy.where(target_open, targets, -1)
+        self.next_player[games] = numpy.where(players == Board.X, Board.O, Board.X)
+
+        decided = games[(outcomes != Board.EMPTY) | winnable_changed]
+        if len(decided) > 0:
+            self._check_completed(decided)
+
+    def check_completed(self):
+        """
+        Recomputes the winner and completion status of every game from the local board results
+        :return: (N,) bool array, True for games which are completed
+        """
+        self._check_completed(numpy.arange(self.size))
+        return self.completed
+
+    def _check_completed(self, games):
+        local_winners = self.local_winners[games]
+        meta_cells = numpy.where((local_winners == Board.X) | (local_winners == Board.O), local_winners, 0)
+        outcomes = _OUTCOMES[numpy.dot(meta_cells.astype(numpy.int32), _POWERS)]
+        won = (outcomes == Board.X) | (outcomes == Board.O)
+        self.winner[games] = numpy.where(won, outcomes, Board.EMPTY)
+
+        # the game is drawn once neither player can capture all three local boards of any meta-line
+        winnable = self.winnable[games]
+        x_can_win = _HAS_LINE[numpy.dot((winnable & OutcomeTable.X_CAN_WIN) != 0, _META_BITS)]
+        o_can_win = _HAS_LINE[numpy.dot((winnable & OutcomeTable.O_CAN_WIN) != 0, _META_BITS)]
+        self.completed[games] = won | (local_winners != Board.EMPTY).all(axis=1) | ~(x_can_win | o_can_win)
+
+    def play_random(self, rng=numpy.random):
+        """
+        Finishes every game in the batch by making random legal moves in lockstep
+        :param rng: a numpy.random.RandomState (or the numpy.random module)
+        :return: (N,) array of winners (Board.X, Board.O, or Board.EMPTY for ties)
+        """
+        # only the games that are still running are advanced, so the batch gets cheaper as its games finish
+        games = numpy.flatnonzero(~self.completed)
+        while len(games) > 0:
+            self._apply(games, self.random_moves(rng, games))
+            games = games[~self.completed[games]]
+        return self.winner
+
+    def representation_matrix(self):
+        """
+        Builds the rows used by the board table and the Weka datasets: 81 cell values followed by the next player
+        :return: (N, 82) int array
+        """
+        return numpy.hstack([self.cells, self.next_player[:, None]]).astype(numpy.int32)
@@ -32,7 +32,7 @@ class Experiment(object):
         :param callback: a function to call at the termination of each game.  The iteration number and winner will be passed as arguments
         :return: None
         """
-        db_insertion_scripts = []
+        db_statements = []
         for i in list(range(0, self.iterations)):
             game = Game(self.p1, self.p2)
             game.finish_game()
@@ -47,14 +47,13 @@ class Experiment(object):
 
             if self.record_result:
                 game_dm = GameDataModel(game)
-                db_insertion_scripts.append(game_dm.get_save_script())
+                db_statements.extend(game_dm.get_save_statements())
 
             if callback is not None:
                 callback(i+1, game.get_winner())
 
         if self.record_result:
-            insertion_script = "\n".join(db_insertion_scripts)
-            DB.execute(insertion_script)
+            DB.execute_many(db_statements)
 
         self.finished = True
 
@@ -3,11 +3,14 @@ from .bots.Bot import Bot
 
 
 class Game(object):
-    def __init__(self, player1, player2):
+    def __init__(self, player1, player2, snapshot_interval=None):
         """
         Game objects represent a game played between two opponents.  Zero, one, or both of the opponents can be bots
         :param player1: Player or Bot object corresponding to the 'X' player
         :param player2: Player or Bot object corresponding to the 'O' player
+        :param snapshot_interval: a compact snapshot of the board (see GlobalBoard.to_bytes) is saved every
+            snapshot_interval moves so that get_position can seek without replaying the whole game.  None (the default)
+            disables them, because live games never seek; analysis code that calls get_position often should set it
         """
         self.board = GlobalBoard()
         self.player1 = player1
@@ -15,6 +18,8 @@ class Game(object):
         self.active_player = player1  # the player who moves next is the active player.  Player 1 always goes first
         self.bot_game = isinstance(player1, Bot) and isinstance(player2, Bot)
         self.moves = []
+        self.snapshot_interval = snapshot_interval
+        self.snapshots = {}  # maps a number of moves to the encoded board after that many moves
         if isinstance(player1, Bot):
             self.player1.setup_bot(self)
 
@@ -32,6 +37,8 @@ class Game(object):
 
         self.board.make_move(move)
         self.moves.append(move)
+        if self.snapshot_interval and len(self.moves) % self.snapshot_interval == 0:
+            self.snapshots[len(self.moves)] = self.board.to_bytes()
         if move.player == self.player1.get_player_symbol():
             self.active_player = self.player2
         else:
@@ -46,6 +53,41 @@ class Game(object):
         else:
             return self.board.get_possible_moves(self.active_player.get_player_symbol())
 
+    def get_position(self, ply):
+        """
+        Rebuilds the board as it was after the first 'ply' moves of this game.
+        The nearest earlier snapshot is decoded and only the moves after it are replayed
+        :param ply: the number of moves to apply, between 0 and len(self.moves)
+        :return: a new GlobalBoard
+        """
+        if ply < 0 or ply > len(self.moves):
+            raise Exception("Requested position %s is out of range for a game of %s moves" % (ply, len(self.moves)))
+
+        start = 0
+        if self.snapshot_interval:
+            start = ply - ply % self.snapshot_interval
+            while start > 0 and start not in self.snapshots:
+                start -= self.snapshot_interval
+        board = GlobalBoard.from_bytes(self.snapshots[start]) if start > 0 else GlobalBoard()
+        for move in self.moves[start:ply]:
+            board.make_move(move)
+        return board
+
+    def replay(self, start=0):
+        """
+        Replays the moves of this game one at a time on a single board.
+        The same GlobalBoard object is updated and yielded at every step, so each position costs one make_move.
+        Clone the board to keep a position beyond the current step.
+
+        :param start: the number of moves to skip before the first yielded position
+        :return: generator of (ply, move, board) tuples, where board is the position after 'ply' moves
+        """
+        board = self.get_position(start)
+        for ply in range(start, len(self.moves)):
+            move = self.moves[ply]
+            board.make_move(move)
+            yield ply + 1, move, board
+
     def is_game_over(self):
         return self.board.board_completed
 
@@ -1,43 +1,240 @@
+import random
 from .Board import Board
 from .LocalBoard import LocalBoard
 from .Move import Move
+from . import BitboardUtils as Bits
+from . import OutcomeTable
+from . import Zobrist
+
+
+def _build_move_table():
+    # table[player][meta][empty_mask] is the tuple of moves for the player into the empty cells of local board 'meta'
+    table = [None, [], []]
+    for player in [Board.X, Board.O]:
+        for meta in range(0, 9):
+            abs_indices = Bits.ABS_INDEX[meta]
+            table[player].append(tuple(
+                tuple(Move.get(player, abs_indices[cell]) for cell in Bits.MASK_BITS[empty_mask])
+                for empty_mask in range(0, Bits.FULL_MASK + 1)
+            ))
+    return table
+
+
+_MOVE_TABLE = _build_move_table()
+
+
+def _build_cell_code_table():
+    # table[player][meta][mask] packs the player's cells of local board 'meta' into the 2-bit cell fields of to_bytes
+    table = [None, [], []]
+    for player in [Board.X, Board.O]:
+        for meta in range(0, 9):
+            abs_indices = Bits.ABS_INDEX[meta]
+            table[player].append(tuple(
+                sum(player << (2 * abs_indices[cell]) for cell in Bits.MASK_BITS[mask])
+                for mask in range(0, Bits.FULL_MASK + 1)
+            ))
+    return table
+
+
+_CELL_CODES = _build_cell_code_table()
 
 
 class GlobalBoard(Board):
     """  Represents the meta-board composed of a 3x3 grid of smaller tic-tac-toe boards
-    the optional 'board' parameter is used internally clone GlobalBoard objects
+    the optional 'board' parameter builds a GlobalBoard from an existing 3x3 grid of LocalBoards.  In that case the
+    'next_player' and 'forced_board' parameters describe whose turn it is and where they must move
+
+    The state of the meta-board is kept in three 9-bit masks: x_mask and o_mask mark the local boards captured by each
+    player, and cat_mask marks the local boards that ended in a tie.  Bit (metarow*3 + metacol) refers to the local
+    board at (metarow, metacol).  The base-3 index of the captured local boards (ties count as empty) is kept
+    alongside the masks so that a meta-line win can be resolved with a single lookup in OutcomeTable.OUTCOMES
+
+    The board also tracks the player who moves next, the local board that player is forced to move in (None for a
+    wild card), and a 64-bit Zobrist hash of the position which is updated incrementally by make_move.  See the
+    Zobrist module for the makeup of the hash.  Positions can be encoded into compact byte strings with to_bytes.
+
+    The game is declared a draw as soon as neither player can complete a meta-line.  x_winnable_mask and
+    o_winnable_mask mark the local boards each player has captured or can still capture (see OutcomeTable.WINNABLE);
+    a player can only win the game through a line of local boards which are all in their mask.
+
+    To generate moves without scanning every cell, the board keeps the mask of empty cells of each local board
+    (empty_masks) and the mask of local boards which are still open (open_mask), both updated incrementally.
+
+    Boards created with clone(copy_on_write=True) share their LocalBoard objects with the original board.  A shared
+    LocalBoard is copied the first time either board needs to modify it (see _shared_mask)
     """
-    def __init__(self, board=None):
+    ENCODED_SIZE = 22  # length of the byte strings produced by to_bytes
+    _WILD_CARD_CODE = 15  # value of the forced board field of to_bytes when the next player has a wild card
+
+    def __init__(self, board=None, next_player=Board.X, forced_board=None):
         Board.__init__(self)
+        self.x_mask = 0
+        self.o_mask = 0
+        self.cat_mask = 0
+        self.next_player = next_player
+        self.forced_board = forced_board
+        self.empty_masks = [Bits.FULL_MASK] * 9
+        self.open_mask = Bits.FULL_MASK
+        self.x_winnable_mask = Bits.FULL_MASK
+        self.o_winnable_mask = Bits.FULL_MASK
+        self._shared_mask = 0  # bit i is set if local board i may be shared with another GlobalBoard
         if board is not None:
             self.board = board
+            for metarow in [0, 1, 2]:
+                for metacol in [0, 1, 2]:
+                    local_board = self.board[metarow][metacol]
+                    self.total_moves += local_board.total_moves
+                    self.empty_masks[metarow * 3 + metacol] = Bits.FULL_MASK ^ (local_board.x_mask | local_board.o_mask)
+                    self._record_local_result(metarow, metacol)
+                    self._record_winnable(metarow * 3 + metacol, local_board)
+            self.check_board_completed(0, 0)
         else:
             self.board = [[LocalBoard(), LocalBoard(), LocalBoard()],
                           [LocalBoard(), LocalBoard(), LocalBoard()],
                           [LocalBoard(), LocalBoard(), LocalBoard()]]
+        self.hash = Zobrist.compute_hash(self)
 
     def make_move(self, move):
         """  Overrides Board.make_move
+
+        Returns an undo token which can be passed to unmake_move to take the move back.  This allows search algorithms
+        to explore the game tree on a single mutable board instead of cloning the board for every node.
+
+        :param move: the Move object to apply
+        :return: an opaque undo token for this move
         """
         local_board = self.board[move.metarow][move.metacol]
         if local_board.board_completed:
             raise Exception("Invalid move.  That meta-board is already completed")
+        if self._shared_mask & (1 << move.meta_index):
+            local_board = self._copy_shared_local_board(move.metarow, move.metacol)
+
+        token = (move, self.x_mask, self.o_mask, self.cat_mask, self.index, self.board_completed, self.winner,
+                 self.next_player, self.forced_board, self.hash, self.x_winnable_mask, self.o_winnable_mask)
 
         local_board.make_move(move)
         self.total_moves += 1
+        self.empty_masks[move.meta_index] &= ~(1 << move.local_index)
 
-        self.check_board_completed(move.metarow, move.metacol)
+        # the meta-board can only change when a local board is completed or a player can no longer capture it
+        winnable_changed = self._record_winnable(move.meta_index, local_board)
+        if local_board.board_completed:
+            self._record_local_result(move.metarow, move.metacol)
+        if local_board.board_completed or winnable_changed:
+            self.check_board_completed(move.metarow, move.metacol)
+
+        # update the hash for the captured cell, the side to move, and the board the next player is sent to
+        board_hash = self.hash ^ Zobrist.CELL_KEYS[move.player][move.abs_index]
+        next_player = Board.O if move.player == Board.X else Board.X
+        if next_player != self.next_player:
+            board_hash ^= Zobrist.SIDE_KEY
+            self.next_player = next_player
+        if self.forced_board is not None:
+            board_hash ^= Zobrist.FORCED_BOARD_KEYS[self.forced_board]
+        if not self.open_mask & (1 << move.local_index):
+            self.forced_board = None
+        else:
+            self.forced_board = move.local_index
+            board_hash ^= Zobrist.FORCED_BOARD_KEYS[move.local_index]
+        self.hash = board_hash
+
+        return token
+
+    def unmake_move(self, token):
+        """
+        Takes back a move made on this board.  Moves must be unmade in the reverse order that they were made.
+        :param token: the undo token returned by make_move
+        :return: None
+        """
+        move, self.x_mask, self.o_mask, self.cat_mask, self.index, self.board_completed, self.winner, \
+            self.next_player, self.forced_board, self.hash, self.x_winnable_mask, self.o_winnable_mask = token
+        local_board = self.board[move.metarow][move.metacol]
+        if self._shared_mask & (1 << move.meta_index):
+            local_board = self._copy_shared_local_board(move.metarow, move.metacol)
+        local_board.unmake_move(move)
+        self.total_moves -= 1
+        self.empty_masks[move.meta_index] |= 1 << move.local_index
+        self.open_mask = Bits.FULL_MASK ^ (self.x_mask | self.o_mask | self.cat_mask)
+
+    def _copy_shared_local_board(self, metarow, metacol):
+        """
+        Private function which replaces a shared local board with a private copy before it is modified
+        :param metarow: the row of the local board
+        :param metacol: the col of the local board
+        :return: the private copy of the LocalBoard
+        """
+        local_board = self.board[metarow][metacol].clone()
+        self.board[metarow][metacol] = local_board
+        self._shared_mask &= ~(1 << (metarow * 3 + metacol))
+        return local_board
+
+    def _record_local_result(self, metarow, metacol):
+        """
+        Private function which copies the result of a completed local board into the meta-board masks
+        :param metarow: the row of the local board
+        :param metacol: the col of the local board
+        :return: None
+        """
+        local_board = self.board[metarow][metacol]
+        cell = metarow * 3 + metacol
+        bit = 1 << cell
+        if local_board.winner == Board.X:
+            self.x_mask |= bit
+            self.index += Board.X * OutcomeTable.POWERS[cell]
+        elif local_board.winner == Board.O:
+            self.o_mask |= bit
+            self.index += Board.O * OutcomeTable.POWERS[cell]
+        elif local_board.cats_game:
+            self.cat_mask |= bit
+        if local_board.board_completed:
+            self.open_mask &= ~bit
+
+    def _record_winnable(self, meta, local_board):
+        """
+        Private function which removes a local board from the winnable mask of each player who can no longer capture it
+        :param meta: the index of the local board on the meta-board (metarow*3 + metacol)
+        :param local_board: the LocalBoard at that index
+        :return: True if either mask changed
+        """
+        winnable = OutcomeTable.WINNABLE[local_board.index]
+        x_winnable_mask = self.x_winnable_mask
+        o_winnable_mask = self.o_winnable_mask
+        if not winnable & OutcomeTable.X_CAN_WIN:
+            self.x_winnable_mask &= ~(1 << meta)
+        if not winnable & OutcomeTable.O_CAN_WIN:
+            self.o_winnable_mask &= ~(1 << meta)
+        return x_winnable_mask != self.x_winnable_mask or o_winnable_mask != self.o_winnable_mask
+
+    def check_board_completed(self, row, col):
+        """  Overrides Board.check_board_completed using the precomputed outcome table
+        The game is also completed (as a draw) once neither player can complete a meta-line
+        """
+        outcome = OutcomeTable.OUTCOMES[self.index]
+        if outcome == Board.X or outcome == Board.O:
+            if self.winner == Board.EMPTY:
+                self.winner = outcome
+            self.board_completed = True
+
+        if (self.x_mask | self.o_mask | self.cat_mask) == Bits.FULL_MASK:
+            self.board_completed = True
+        elif not Bits.HAS_LINE[self.x_winnable_mask] and not Bits.HAS_LINE[self.o_winnable_mask]:
+            self.board_completed = True
+
+        return self.board_completed
 
     def check_cell(self, row, col):
         """  Overrides Board.check_cell
         """
         if row < 0 or row > 2 or col < 0 or col > 2:
             raise Exception("Requested meta-cell is out of bounds")
-        local_board = self.board[row][col]
-        if local_board.cats_game:
+        bit = 1 << (row * 3 + col)
+        if self.x_mask & bit:
+            return Board.X
+        elif self.o_mask & bit:
+            return Board.O
+        elif self.cat_mask & bit:
             return Board.CAT
-        else:
-            return local_board.winner
+        return Board.EMPTY
 
     def check_small_cell(self, metarow, metacol, row, col):
         """
@@ -59,6 +256,7 @@ class GlobalBoard(Board):
         """
         Returns an array of valid moves following the specified last move
         If last_move is None then all possible moves for the Board.X player will be returned.
+        When the player gets a "wild card", moves are grouped by local board.
 
         :param last_move: the last move to be played on this board
         :return: array of Move objects that are valid to follow the last move
@@ -67,74 +265,159 @@ class GlobalBoard(Board):
         if last_move is None:
             return self.get_possible_moves()
 
-        valid_moves = []
         player = Board.X
         if last_move.player == Board.X:
             player = Board.O
 
-        new_global_row = last_move.row
-        new_global_col = last_move.col
+        moves_by_mask = _MOVE_TABLE[player]
+        next_board = last_move.local_index  # the last move sent the opponent to this board
+        if self.open_mask & (1 << next_board):
+            # the player can move to any open space on THIS board
+            return list(moves_by_mask[next_board][self.empty_masks[next_board]])
+
+        #  if the board has been completed, the player gets a "wild card" - can move to any open space on a non-completed board
+        valid_moves = []
+        empty_masks = self.empty_masks
+        for meta in Bits.MASK_BITS[self.open_mask]:
+            valid_moves.extend(moves_by_mask[meta][empty_masks[meta]])
+        return valid_moves
 
-        next_local_board = self.board[new_global_row][new_global_col]  # the last move sent the opponent to this board
+    def count_valid_moves(self, last_move):
+        """
+        Counts the valid moves following the specified last move without building the list of moves
+        :param last_move: the last move to be played on this board
+        :return: the number of Move objects that get_valid_moves would return
+        """
+        if last_move is None:
+            return 81
 
-        if next_local_board.board_completed:
-            #  if the board has been won, the player gets a "wild card" - can move to any open space on a non-completed board
-            for i in list(range(0, 9)):
-                metarow = i // 3
-                row = i % 3
-                for j in list(range(0, 9)):
-                    metacol = j // 3
-                    col = j % 3
-                    if not self.board[metarow][metacol].board_completed and self.board[metarow][metacol].check_cell(row, col) == Board.EMPTY:
-                        valid_moves.append(Move(player, metarow, metacol, row, col))
+        next_board = last_move.local_index
+        if self.open_mask & (1 << next_board):
+            return Bits.POPCOUNT[self.empty_masks[next_board]]
 
-        else:
-            # otherwise the player can move to any open space on THIS board
-            for i in [0, 1, 2]:
-                for j in [0, 1, 2]:
-                    if next_local_board.check_cell(i, j) == Board.EMPTY:
-                        valid_moves.append(Move(player, new_global_row, new_global_col, i, j))
+        count = 0
+        for meta in Bits.MASK_BITS[self.open_mask]:
+            count += Bits.POPCOUNT[self.empty_masks[meta]]
+        return count
 
-        return valid_moves
+    def get_random_valid_move(self, last_move, rng=random):
+        """
+        Picks a valid move uniformly at random without building the list of valid moves.
+        Equivalent to random.choice(self.get_valid_moves(last_move))
+
+        :param last_move: the last move to be played on this board
+        :param rng: the random.Random instance (or the random module) used to make the choice
+        :return: a randomly selected valid Move
+        """
+        if last_move is None:
+            return Move.get(Board.X, rng.randrange(81))
+
+        player = Board.X
+        if last_move.player == Board.X:
+            player = Board.O
+
+        moves_by_mask = _MOVE_TABLE[player]
+        next_board = last_move.local_index
+        if self.open_mask & (1 << next_board):
+            return rng.choice(moves_by_mask[next_board][self.empty_masks[next_board]])
+
+        empty_masks = self.empty_masks
+        choice = rng.randrange(self.count_valid_moves(last_move))
+        for meta in Bits.MASK_BITS[self.open_mask]:
+            moves = moves_by_mask[meta][empty_masks[meta]]
+            if choice < len(moves):
+                return moves[choice]
+            choice -= len(moves)
 
     def get_possible_moves(self, player=Board.X):
         """
         :return:  a list of all possible moves on a completely empty board
         """
-        moves = []
-        for i in list(range(0, 9)):
-            metarow = i // 3
-            row = i % 3
-            for j in list(range(0, 9)):
-                metacol = j // 3
-                col = j % 3
-                moves.append(Move(player, metarow, metacol, row, col))
+        return list(Move.get_all(player))
 
-        return moves
+    def clone(self, copy_on_write=False):
+        """
+        Copies this board
+        :param copy_on_write: if True, the new board shares its LocalBoard objects with this board, and each board
+            copies a LocalBoard only when it makes (or unmakes) a move on it.  Since a move only changes one local
+            board, a clone that is followed by a single move copies one LocalBoard instead of nine.
+        :return: the new GlobalBoard
+        """
+        if copy_on_write:
+            cloned_board = [list(self.board[0]), list(self.board[1]), list(self.board[2])]
+            self._shared_mask = Bits.FULL_MASK
+        else:
+            cloned_board = [[self.board[0][0].clone(), self.board[0][1].clone(), self.board[0][2].clone()],
+                            [self.board[1][0].clone(), self.board[1][1].clone(), self.board[1][2].clone()],
+                            [self.board[2][0].clone(), self.board[2][1].clone(), self.board[2][2].clone()]]
+        # copy the meta-board state (masks, hash, etc.) directly rather than recomputing it from the local boards
+        new_global_board = GlobalBoard.__new__(GlobalBoard)
+        new_global_board.__dict__.update(self.__dict__)
+        new_global_board.board = cloned_board
+        new_global_board.empty_masks = list(self.empty_masks)
+        if not copy_on_write:
+            new_global_board._shared_mask = 0
+        return new_global_board
 
-    def clone(self):
-        cloned_board = [[self.board[0][0].clone(), self.board[0][1].clone(), self.board[0][2].clone()],
-                        [self.board[1][0].clone(), self.board[1][1].clone(), self.board[1][2].clone()],
-                        [self.board[2][0].clone(), self.board[2][1].clone(), self.board[2][2].clone()]]
-        new_global_board = GlobalBoard(board=cloned_board)
+    def to_bytes(self):
+        """
+        Encodes the position as a compact, canonical byte string of GlobalBoard.ENCODED_SIZE (22) bytes.
+        Equal positions always produce equal encodings, so the bytes can be used as keys.
 
-        new_global_board.board_completed = self.board_completed
-        new_global_board.total_moves = self.total_moves
-        new_global_board.winner = self.winner
-        return new_global_board
+        Bytes 0-20 hold the cells in Move.abs_index order, 2 bits per cell (0 = empty, 1 = X, 2 = O), with cell i in
+        bits 2*(i % 4) of byte i // 4.  Byte 21 holds the forced board (0-8, or 15 for a wild card) in its low four
+        bits and the side to move (0 for X, 1 for O) in bit 4.
+        :return: bytes object
+        """
+        packed_cells = 0
+        x_codes = _CELL_CODES[Board.X]
+        o_codes = _CELL_CODES[Board.O]
+        meta = 0
+        for local_row in self.board:
+            for local_board in local_row:
+                packed_cells |= x_codes[meta][local_board.x_mask] | o_codes[meta][local_board.o_mask]
+                meta += 1
+
+        forced_board = GlobalBoard._WILD_CARD_CODE if self.forced_board is None else self.forced_board
+        side = 1 if self.next_player == Board.O else 0
+        return packed_cells.to_bytes(21, 'little') + bytes([forced_board | (side << 4)])
+
+    @staticmethod
+    def from_bytes(data):
+        """
+        Decodes a position encoded by to_bytes
+        :param data: bytes-like object of GlobalBoard.ENCODED_SIZE bytes
+        :return: a new GlobalBoard.  Only the position is encoded, so the board has no move history
+        """
+        if len(data) != GlobalBoard.ENCODED_SIZE:
+            raise Exception("Encoded positions must be %s bytes long" % GlobalBoard.ENCODED_SIZE)
+
+        packed_cells = int.from_bytes(bytes(data[0:21]), 'little')
+        local_boards = []
+        for meta in range(0, 9):
+            x_mask = 0
+            o_mask = 0
+            abs_indices = Bits.ABS_INDEX[meta]
+            for cell in range(0, 9):
+                value = (packed_cells >> (2 * abs_indices[cell])) & 3
+                if value == Board.X:
+                    x_mask |= 1 << cell
+                elif value == Board.O:
+                    o_mask |= 1 << cell
+            local_boards.append(LocalBoard.from_masks(x_mask, o_mask))
+
+        forced_board = data[21] & 0x0F
+        next_player = Board.O if data[21] & 0x10 else Board.X
+        return GlobalBoard(board=[local_boards[0:3], local_boards[3:6], local_boards[6:9]], next_player=next_player,
+                           forced_board=None if forced_board == GlobalBoard._WILD_CARD_CODE else forced_board)
 
     def counts(self):
         x_counts = 0
         o_counts = 0
-        for i in list(range(0, 9)):
-            metarow = i//3
-            row = i % 3
-            for j in list(range(0, 9)):
-                metacol = j//3
-                col = j % 3
-                cell = self.board[metarow][metacol].check_cell(row, col)
-                if cell == Board.X: x_counts += 1
-                elif cell == Board.O: o_counts += 1
+        for local_row in self.board:
+            for local_board in local_row:
+                x_counts += Bits.POPCOUNT[local_board.x_mask]
+                o_counts += Bits.POPCOUNT[local_board.o_mask]
 
         return x_counts, o_counts
 
@@ -1,38 +1,108 @@
-import numpy
 from .Board import Board
+from . import BitboardUtils as Bits
+from . import OutcomeTable
 
 
 class LocalBoard(Board):
     """  Represents a traditional 3x3 tic tac toe board
+
+    The cells are stored as two 9-bit masks (one per player).  Bit (row*3 + col) of x_mask is set if X holds the cell
+    at (row, col), and likewise for o_mask.  The base-3 index of the board is kept alongside the masks so that
+    completion can be resolved with a single lookup in OutcomeTable.OUTCOMES
     """
     def __init__(self):
         Board.__init__(self)
-        self.board = numpy.ones((3, 3)) * Board.EMPTY
+        self.x_mask = 0
+        self.o_mask = 0
         self.cats_game = False
 
+    @staticmethod
+    def from_masks(x_mask, o_mask):
+        """
+        Builds a LocalBoard from the cells held by each player
+        :param x_mask: 9-bit mask of the cells held by X
+        :param o_mask: 9-bit mask of the cells held by O
+        :return: a new LocalBoard
+        """
+        local_board = LocalBoard()
+        local_board.x_mask = x_mask
+        local_board.o_mask = o_mask
+        local_board.index = OutcomeTable.masks_to_index(x_mask, o_mask)
+        local_board.total_moves = Bits.POPCOUNT[x_mask | o_mask]
+        local_board.check_board_completed(0, 0)
+        local_board.cats_game = local_board.total_moves == 9 and local_board.winner == Board.EMPTY
+        return local_board
+
     def check_cell(self, row, col):
         """  Overrides Board.check_cell
         """
         if row < 0 or row > 2 or col < 0 or col > 2:
             raise Exception("Requested cell is out of bounds")
-        return self.board[row][col]
+        bit = 1 << (row * 3 + col)
+        if self.x_mask & bit:
+            return Board.X
+        elif self.o_mask & bit:
+            return Board.O
+        return Board.EMPTY
 
     def make_move(self, move):
         """  Overrides Board.make_move
         """
-        if self.board[move.row][move.col] != Board.EMPTY:
+        cell = move.local_index
+        bit = 1 << cell
+        if (self.x_mask | self.o_mask) & bit:
             raise Exception("You cannot make a move in an occupied slot")
 
-        self.board[move.row][move.col] = move.player
+        if move.player == Board.X:
+            self.x_mask |= bit
+        else:
+            self.o_mask |= bit
+        self.index += move.player * OutcomeTable.POWERS[cell]
         self.total_moves += 1
         self.check_board_completed(move.row, move.col)
 
         if self.total_moves == 9 and self.winner != Board.X and self.winner != Board.O:
             self.cats_game = True
 
+    def unmake_move(self, move):
+        """
+        Takes back the given move, which must be the most recent move made on this board
+        :param move: the Move object to take back
+        :return: None
+        """
+        cell = move.local_index
+        bit = 1 << cell
+        if move.player == Board.X:
+            self.x_mask &= ~bit
+        else:
+            self.o_mask &= ~bit
+        self.index -= move.player * OutcomeTable.POWERS[cell]
+        self.total_moves -= 1
+
+        # the previous state can be recovered from the outcome table
+        outcome = OutcomeTable.OUTCOMES[self.index]
+        self.board_completed = outcome != Board.EMPTY
+        self.winner = outcome if outcome == Board.X or outcome == Board.O else Board.EMPTY
+        self.cats_game = outcome == Board.CAT
+
+    def check_board_completed(self, row, col):
+        """  Overrides Board.check_board_completed using the precomputed outcome table
+        """
+        outcome = OutcomeTable.OUTCOMES[self.index]
+        if outcome == Board.X or outcome == Board.O:
+            if self.winner == Board.EMPTY:
+                self.winner = outcome
+            self.board_completed = True
+        elif outcome == Board.CAT:
+            self.board_completed = True
+
+        return self.board_completed
+
     def clone(self):
         new_local_board = LocalBoard()
-        new_local_board.board = numpy.copy(self.board)
+        new_local_board.x_mask = self.x_mask
+        new_local_board.o_mask = self.o_mask
+        new_local_board.index = self.index
         new_local_board.cats_game = self.cats_game
         new_local_board.board_completed = self.board_completed
         new_local_board.total_moves = self.total_moves
@@ -43,13 +113,13 @@ class LocalBoard(Board):
         representation = ""
         for row in [0, 1, 2]:
             for col in [0, 1, 2]:
-                if self.board[row][col] == Board.O:
+                cell = self.check_cell(row, col)
+                if cell == Board.O:
                     representation += "O"
-                elif self.board[row][col] == Board.X:
+                elif cell == Board.X:
                     representation += "x"
                 else:
                     representation += "_"
             if row != 2:
                 representation += "\n"
         return representation
-
@@ -1,10 +1,23 @@
 from . import Board
-import numpy
+
 
 class Move(object):
-    def __init__(self, player, metarow, metacol, row, col):
+    """
+    Represents a move made at the specified metarow, metacol, row, and col
+
+    There are only 162 distinct moves (2 players x 81 cells), so every Move is an immutable flyweight taken from a
+    precomputed table.  Calling Move(player, metarow, metacol, row, col) validates the arguments and returns the
+    interned instance; Move.get(player, abs_index) skips validation and is the preferred accessor in hot loops.
+    Since moves are interned and hashable they can be used as dictionary keys (e.g. in transposition or history tables)
+    """
+    __slots__ = ('player', 'metarow', 'metacol', 'row', 'col', 'abs_row', 'abs_col', 'abs_index', 'meta_index',
+                 'local_index', '_hash')
+
+    _table = None  # _table[player][abs_index] is the interned Move.  Built when the module is loaded
+
+    def __new__(cls, player, metarow, metacol, row, col):
         """
-        Represents a move made at the specified metarow, metacol, row, and col
+        Gets the move made at the specified metarow, metacol, row, and col
         :param player: the player number making the move.  Should be Board.X or Board.O
         :param metarow: the row number of the meta-cell where the move is located
         :param metacol: the col number of the meta-cell where the move is located
@@ -12,27 +25,70 @@ class Move(object):
         :param col: the col number of the microboard cell where the move is located
         """
         # check input validity
-        if player not in [Board.X, Board.O]:
+        if player != Board.X and player != Board.O:
             raise Exception("Tried to initialize move for player number %s" % player)
-        if (numpy.array([metarow, metacol, row, col]) > 2).any() or (numpy.array([metarow, metacol, row, col]) < 0).any():
-            raise Exception("Move index out of bounds")
+        for index in (metarow, metacol, row, col):
+            if index < 0 or index > 2:
+                raise Exception("Move index out of bounds")
 
-        self.player = player
-        self.metarow = metarow
-        self.metacol = metacol
-        self.row = row
-        self.col = col
+        return Move._table[player][(metarow*3 + row) * 9 + metacol*3 + col]
 
-        # abs_row, abs_col represent the location of the move on a 9x9 grid
-        self.abs_row = metarow*3 + row
-        self.abs_col = metacol*3 + col
+    @staticmethod
+    def get(player, abs_index):
+        """
+        Fast accessor for interned moves.  The arguments are not validated
+        :param player: Board.X or Board.O
+        :param abs_index: the location of the move on the 9x9 grid, abs_row * 9 + abs_col
+        :return: the interned Move object
+        """
+        return Move._table[player][abs_index]
+
+    @staticmethod
+    def get_all(player):
+        """
+        :param player: Board.X or Board.O
+        :return: tuple of the 81 interned moves for the player, ordered by abs_index
+        """
+        return Move._table[player]
+
+    @classmethod
+    def _build(cls, player, abs_index):
+        move = object.__new__(cls)
+        abs_row = abs_index // 9
+        abs_col = abs_index % 9
+        for name, value in (('player', player), ('metarow', abs_row // 3), ('metacol', abs_col // 3),
+                            ('row', abs_row % 3), ('col', abs_col % 3), ('abs_row', abs_row), ('abs_col', abs_col),
+                            ('abs_index', abs_index), ('_hash', (player - 1) * 81 + abs_index)):
+            object.__setattr__(move, name, value)
+        # indices of the move's local board on the meta-board, and of the cell within the local board
+        object.__setattr__(move, 'meta_index', move.metarow*3 + move.metacol)
+        object.__setattr__(move, 'local_index', move.row*3 + move.col)
+        return move
+
+    def __setattr__(self, name, value):
+        raise Exception("Move objects are immutable")
+
+    def __reduce__(self):
+        # interned moves are pickled by reference to the table
+        return Move.get, (self.player, self.abs_index)
 
     def __str__(self):
         return "Player %s made a move at (%s, %s, %s, %s)" % (self.player, self.metarow, self.metacol, self.row, self.col)
 
     def __eq__(self, other):
-        return self.player == other.player and self.metarow == other.metarow and self.metacol == other.metacol \
-            and self.row == other.row and self.col == other.col
+        if self is other:
+            return True
+        if not isinstance(other, Move):
+            return False
+        return self.player == other.player and self.abs_index == other.abs_index
 
     def __ne__(self, other):
         return not self.__eq__(other)
+
+    def __hash__(self):
+        return self._hash
+
+
+Move._table = (None,
+               tuple(Move._build(Board.X, abs_index) for abs_index in range(0, 81)),
+               tuple(Move._build(Board.O, abs_index) for abs_index in range(0, 81)))
@@ -0,0 +1,101 @@
+from .Board import Board
+from . import BitboardUtils as Bits
+
+"""
+The OutcomeTable module precomputes the status of every possible 3x3 tic-tac-toe configuration.
+
+A configuration is identified by its base-3 index: sum(value(cell) * 3**cell) over the nine cells, where cell is
+row*3 + col and value is 0 for an empty cell, 1 for X, and 2 for O.  Since Board.X == 1 and Board.O == 2, a board can
+keep its index up to date by adding move.player * POWERS[cell] whenever a move is made.
+
+OUTCOMES[index] is Board.X or Board.O if that player holds a complete line, Board.CAT if all nine cells are filled
+without a winner, and Board.EMPTY if the board is still open.  If both players hold a line (which cannot happen in a
+legal game) the configuration is treated as a win for X.
+
+WINNABLE[index] holds the flags X_CAN_WIN and O_CAN_WIN for the players who have won the board or can still win it,
+i.e. who hold a line or have a line without any of the opponent's cells on an open board.  A board which neither
+player can win any more is effectively a tie, even while it has empty cells.
+"""
+
+NUM_CONFIGURATIONS = 3 ** 9  # 19,683
+
+X_CAN_WIN = 1
+O_CAN_WIN = 2
+
+# POWERS[i] is the weight of cell i in a base-3 index
+POWERS = tuple(3 ** cell for cell in range(0, 9))
+
+
+def index_to_masks(index):
+    """
+    Converts a base-3 index into a pair of bitmasks
+    :param index: integer between 0 and NUM_CONFIGURATIONS - 1
+    :return: tuple (x_mask, o_mask)
+    """
+    x_mask = 0
+    o_mask = 0
+    for cell in range(0, 9):
+        value = index % 3
+        if value == Board.X:
+            x_mask |= 1 << cell
+        elif value == Board.O:
+            o_mask |= 1 << cell
+        index //= 3
+    return x_mask, o_mask
+
+
+def masks_to_index(x_mask, o_mask):
+    """
+    Converts a pair of bitmasks into a base-3 index
+    :param x_mask: 9-bit mask of the cells held by X
+    :param o_mask: 9-bit mask of the cells held by O
+    :return: integer between 0 and NUM_CONFIGURATIONS - 1
+    """
+    index = 0
+    for cell in range(0, 9):
+        if x_mask & (1 << cell):
+            index += Board.X * POWERS[cell]
+        elif o_mask & (1 << cell):
+            index += Board.O * POWERS[cell]
+    return index
+
+
+def _build_outcome_table():
+    outcomes = []
+    for index in range(0, NUM_CONFIGURATIONS):
+        x_mask, o_mask = index_to_masks(index)
+        if Bits.has_line(x_mask):
+            outcomes.append(Board.X)
+        elif Bits.has_line(o_mask):
+            outcomes.append(Board.O)
+        elif (x_mask | o_mask) == Bits.FULL_MASK:
+            outcomes.append(Board.CAT)
+        else:
+            outcomes.append(Board.EMPTY)
+    return tuple(outcomes)
+
+
+OUTCOMES = _build_outcome_table()
+
+
+def _build_winnable_table():
+    winnable = []
+    for index in range(0, NUM_CONFIGURATIONS):
+        x_mask, o_mask = index_to_masks(index)
+        outcome = OUTCOMES[index]
+        flags = 0
+        if outcome == Board.X:
+            flags = X_CAN_WIN
+        elif outcome == Board.O:
+            flags = O_CAN_WIN
+        elif outcome == Board.EMPTY:
+            for line in Bits.WIN_LINES:
+                if not line & o_mask:
+                    flags |= X_CAN_WIN
+                if not line & x_mask:
+                    flags |= O_CAN_WIN
+        winnable.append(flags)
+    return tuple(winnable)
+
+
+WINNABLE = _build_winnable_table()
@@ -0,0 +1,212 @@
+import time
+from .Board import Board
+from .GlobalBoard import GlobalBoard
+from .BoardBatch import BoardBatch
+from .Move import Move
+
+"""
+The Perft module measures and verifies move generation.
+
+perft(board, depth) counts the leaf nodes of the game tree to the given depth: every sequence of 'depth' legal moves
+from the position is one leaf, and a game which ends early contributes no leaves.  The count only depends on the rules,
+so it can be checked against reference values computed by another implementation, and the time it takes is a direct
+measure of the speed of get_valid_moves, make_move and unmake_move.
+
+REFERENCE_POSITIONS holds positions with leaf counts computed by the original (pre-bitboard) engine.  A position is
+given as the sequence of abs indices (abs_row*9 + abs_col) of the moves leading to it, played alternately by X and O.
+The original engine did not declare dead draws (see GlobalBoard), but none of the reference trees reach one.
+
+differential(board, depth) walks two board implementations side by side and compares the legal moves and
+the result of every position in the tree.  Any object with the GlobalBoard interface (get_valid_moves, make_move,
+clone, board_completed and winner) can serve as the reference, e.g. the GlobalBoard of an older checkout.  By default
+the position is checked against BoardBatch, which implements the rules independently with array operations.
+
+Run 'python -m models.game.Perft [max_depth]' to check and time all of the reference positions.
+"""
+
+# (name, moves, (leaf count at depth 1, leaf count at depth 2, ...))
+REFERENCE_POSITIONS = (
+    ("start", (), (81, 720, 6336, 55080, 473256)),
+    ("forced", (49, 59, 7, 5, 26, 62, 8, 6, 0, 10, 39, 29, 16, 32, 24, 63, 37, 31, 13, 48, 65, 33, 9, 38),
+     (8, 100, 935, 8288, 77787)),
+    ("wild card", (72, 56, 24, 54, 2, 25, 68, 35, 6, 19, 67, 32, 16, 39, 47, 79, 66, 38, 53, 70, 40, 48, 65, 34, 4, 22,
+                   44, 42, 45, 73),
+     (45, 402, 3484, 31430)),
+    ("endgame", (43, 32, 7, 22, 67, 48, 55, 14, 33, 10, 39, 47, 70, 41, 42, 37, 40, 31, 13, 30, 20, 71, 44, 76, 59, 26,
+                 62, 25, 75, 72, 63, 29, 24, 64, 65, 45, 56, 16, 21, 73, 54, 1, 23, 61),
+     (4, 31, 312, 2844, 24848)),
+)
+
+
+def setup_position(moves):
+    """
+    Plays a sequence of moves from the empty board
+    :param moves: sequence of abs indices, played alternately by X and O
+    :return: tuple (board, last_move) where last_move is None if no moves were played
+    """
+    board = GlobalBoard()
+    last_move = None
+    for i, abs_index in enumerate(moves):
+        last_move = Move.get(Board.X if i % 2 == 0 else Board.O, abs_index)
+        board.make_move(last_move)
+    return board, last_move
+
+
+def perft(board, depth, last_move=None):
+    """
+    Counts the leaf nodes of the game tree below a position.  The board is searched with make_move/unmake_move and
+    is left unchanged
+    :param board: the GlobalBoard to search from
+    :param depth: the number of moves to look ahead
+    :param last_move: the last move played on the board, or None for the empty board
+    :return: the number of move sequences of length 'depth' which can be played from the position
+    """
+    if depth == 0:
+        return 1
+    if board.board_completed:
+        return 0
+
+    moves = board.get_valid_moves(last_move)
+    if depth == 1:
+        return len(moves)
+
+    nodes = 0
+    for move in moves:
+        token = board.make_move(move)
+        nodes += perft(board, depth - 1, move)
+        board.unmake_move(token)
+    return nodes
+
+
+def divide(board, depth, last_move=None):
+    """
+    Splits the perft count of a position by its first move.  Comparing two divides narrows a wrong count down to a
+    single line of play
+    :return: dictionary mapping each valid Move to the leaf count below it
+    """
+    counts = {}
+    for move in board.get_valid_moves(last_move):
+        token = board.make_move(move)
+        counts[move] = perft(board, depth - 1, move)
+        board.unmake_move(token)
+    return counts
+
+
+def run(max_depth=None, positions=REFERENCE_POSITIONS, verbose=True):
+    """
+    Runs perft on a set of positions and checks the results against their reference counts
+    :param max_depth: the deepest search to run on each position.  Defaults to the deepest reference count
+    :param positions: sequence of (name, moves, expected_counts) tuples, like REFERENCE_POSITIONS
+    :param verbose: if True, print one line per search
+    :return: list of (name, depth, nodes, expected, seconds) tuples.  Use check() to raise on a wrong count
+    """
+    results = []
+    for name, moves, expected_counts in positions:
+        board, last_move = setup_position(moves)
+        depth_limit = len(expected_counts) if max_depth is None else min(max_depth, len(expected_counts))
+        for depth in range(1, depth_limit + 1):
+            start_time = time.perf_counter()
+            nodes = perft(board, depth, last_move)
+            seconds = time.perf_counter() - start_time
+            expected = expected_counts[depth - 1]
+            results.append((name, depth, nodes, expected, seconds))
+            if verbose:
+                print("%-10s depth %s: %9s nodes %10.0f nodes/s  %s" % (
+                    name, depth, nodes, nodes / seconds if seconds > 0 else 0, "ok" if nodes == expected
+                    else "FAILED (expected %s)" % expected))
+    return results
+
+
+def check(results):
+    """
+    :param results: list returned by run()
+    :return: the total nodes per second of the results
+    """
+    for name, depth, nodes, expected, seconds in results:
+        if nodes != expected:
+            raise Exception("Perft mismatch for position '%s' at depth %s: counted %s nodes, expected %s"
+                            % (name, depth, nodes, expected))
+    total_seconds = sum(result[4] for result in results)
+    return sum(result[2] for result in results) / total_seconds if total_seconds > 0 else 0
+
+
+class _BatchReference(object):
+    """ Adapts a single-game BoardBatch to the part of the GlobalBoard interface used by differential() """
+    def __init__(self, batch):
+        self.batch = batch
+
+    @property
+    def board_completed(self):
+        return bool(self.batch.completed[0])
+
+    @property
+    def winner(self):
+        return int(self.batch.winner[0])
+
+    def get_valid_moves(self, last_move):
+        player = int(self.batch.next_player[0])
+        return [Move.get(player, int(abs_index)) for abs_index in self.batch.legal_mask()[0].nonzero()[0]]
+
+    def make_move(self, move):
+        self.batch.apply([move.abs_index])
+
+    def clone(self):
+        return _BatchReference(self.batch.copy())
+
+
+def _move_key(move):
+    # moves from different implementations are matched by their coordinates
+    return move.player, move.metarow, move.metacol, move.row, move.col
+
+
+def differential(board, depth, last_move=None, reference=None, reference_last_move=None):
+    """
+    Walks the game tree of a position with two board implementations in lockstep and checks that they agree on the
+    legal moves, the winner, and whether the game is over at every node.  The reference board is copied with clone()
+    before each move, so it does not need to support unmake_move
+    :param board: the GlobalBoard to check.  It is searched with make_move/unmake_move and is left unchanged
+    :param depth: the number of moves to look ahead
+    :param last_move: the last move played on the board, or None for the empty board
+    :param reference: a board with the GlobalBoard interface holding the same position.  Defaults to a BoardBatch
+    :param reference_last_move: the last move played on the reference board, if it uses its own Move class
+    :return: the perft count of the position, which both implementations agree on
+    """
+    if reference is None:
+        reference = _BatchReference(BoardBatch.from_boards([board]))
+        reference_last_move = last_move
+    return _differential(board, reference, depth, last_move, reference_last_move, [])
+
+
+def _differential(board, reference, depth, last_move, reference_last_move, path):
+    if board.board_completed != reference.board_completed or board.winner != reference.winner:
+        raise Exception("Board implementations disagree on the result after moves %s: (%s, %s) != (%s, %s)"
+                        % (path, board.board_completed, board.winner, reference.board_completed, reference.winner))
+    if depth == 0:
+        return 1
+    if board.board_completed:
+        return 0
+
+    moves = board.get_valid_moves(last_move)
+    reference_moves = dict((_move_key(move), move) for move in reference.get_valid_moves(reference_last_move))
+    if len(moves) != len(reference_moves) or any(_move_key(move) not in reference_moves for move in moves):
+        raise Exception("Board implementations disagree on the valid moves after moves %s: %s != %s"
+                        % (path, sorted(_move_key(move) for move in moves), sorted(reference_moves)))
+    if depth == 1:
+        return len(moves)
+
+    nodes = 0
+    for move in moves:
+        reference_move = reference_moves[_move_key(move)]
+        child_reference = reference.clone()
+        child_reference.make_move(reference_move)
+        token = board.make_move(move)
+        path.append(move.abs_index)
+        nodes += _differential(board, child_reference, depth - 1, move, reference_move, path)
+        path.pop()
+        board.unmake_move(token)
+    return nodes
+
+
+if __name__ == '__main__':
+    import sys
+    print("%.0f nodes/s" % check(run(int(sys.argv[1]) if len(sys.argv) > 1 else None)))
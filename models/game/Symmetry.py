@@ -0,0 +1,72 @@
+from operator import itemgetter
+
+"""
+The Symmetry module maps positions to a canonical orientation.
+
+The 9x9 grid has 8 dihedral symmetries (4 rotations, each optionally mirrored).  Every symmetry maps local boards onto
+local boards and preserves the rules of the game, so positions which differ only by a symmetry are equivalent.
+
+PERMUTATIONS[s][i] is the cell (in Move.abs_index order) which symmetry s moves to cell i.  The canonical orientation of
+a position is the lexicographically smallest of its 8 transformed cell sequences.
+"""
+
+
+def _transforms():
+    # each transform maps (abs_row, abs_col) to its new location on the 9x9 grid
+    return [
+        lambda r, c: (r, c),  # identity
+        lambda r, c: (c, 8 - r),  # rotate 90 degrees clockwise
+        lambda r, c: (8 - r, 8 - c),  # rotate 180 degrees
+        lambda r, c: (8 - c, r),  # rotate 270 degrees clockwise
+        lambda r, c: (r, 8 - c),  # mirror left-right
+        lambda r, c: (8 - r, c),  # mirror top-bottom
+        lambda r, c: (c, r),  # transpose (main diagonal)
+        lambda r, c: (8 - c, 8 - r),  # transpose (anti-diagonal)
+    ]
+
+
+def _build_permutations():
+    permutations = []
+    for transform in _transforms():
+        permutation = [0] * 81
+        for source in range(0, 81):
+            new_row, new_col = transform(source // 9, source % 9)
+            permutation[new_row * 9 + new_col] = source
+        permutations.append(tuple(permutation))
+    return tuple(permutations)
+
+
+PERMUTATIONS = _build_permutations()
+# DESTINATIONS[s][cell] is the cell that symmetry s moves 'cell' to (the inverse of PERMUTATIONS[s]).  It lets the
+# transformed cell sequences of a position be updated one cell at a time as moves are made
+DESTINATIONS = tuple(
+    tuple(permutation.index(cell) for cell in range(0, 81)) for permutation in PERMUTATIONS
+)
+_GETTERS = tuple(itemgetter(*permutation) for permutation in PERMUTATIONS)
+
+
+def transform(cells, symmetry):
+    """
+    Applies one of the 8 symmetries to a sequence of 81 cell values
+    :param cells: sequence of 81 values in Move.abs_index order
+    :param symmetry: integer between 0 and 7 indexing PERMUTATIONS
+    :return: tuple of the 81 transformed values
+    """
+    return _GETTERS[symmetry](cells)
+
+
+def canonicalize(cells):
+    """
+    Finds the canonical orientation of a position
+    :param cells: sequence of 81 values in Move.abs_index order (e.g. BoardDataModel.representation)
+    :return: tuple (canonical_cells, symmetry) where canonical_cells is the smallest transformed tuple and symmetry is
+        the index of the symmetry that produces it
+    """
+    best_cells = None
+    best_symmetry = 0
+    for symmetry, getter in enumerate(_GETTERS):
+        transformed = getter(cells)
+        if best_cells is None or transformed < best_cells:
+            best_cells = transformed
+            best_symmetry = symmetry
+    return best_cells, best_symmetry
@@ -0,0 +1,52 @@
+import random
+from .Board import Board
+from . import BitboardUtils as Bits
+
+"""
+The Zobrist module holds the random keys used to hash GlobalBoard positions.
+
+The hash of a position is the XOR of:
+  - CELL_KEYS[player][abs_index] for every cell captured by a player (abs_index = abs_row*9 + abs_col)
+  - SIDE_KEY if O is the next player to move
+  - FORCED_BOARD_KEYS[i] if the last move forces the next player to move in local board i (no key for a wild card)
+
+Since every term is XOR'd in, GlobalBoard can update its hash incrementally in make_move.  The keys are drawn from a
+fixed seed so that hashes are stable between runs and between processes (e.g. for persistent tables or DB lookups)
+"""
+
+_random = random.Random(0x5A0B1A57)
+
+
+def _random_key():
+    return _random.getrandbits(64)
+
+
+CELL_KEYS = (None, tuple(_random_key() for i in range(0, 81)), tuple(_random_key() for i in range(0, 81)))
+SIDE_KEY = _random_key()
+FORCED_BOARD_KEYS = tuple(_random_key() for i in range(0, 9))
+
+
+def compute_hash(global_board):
+    """
+    Computes the Zobrist hash of a GlobalBoard from scratch.  GlobalBoard maintains its hash incrementally, so this
+    is only needed when a board is built from its parts (and for checking the incremental hash)
+    :param global_board: the GlobalBoard to hash
+    :return: a 64-bit integer hash
+    """
+    board_hash = 0
+    for metarow in [0, 1, 2]:
+        for metacol in [0, 1, 2]:
+            local_board = global_board.board[metarow][metacol]
+            abs_indices = Bits.ABS_INDEX[metarow * 3 + metacol]
+            for local_index in range(0, 9):
+                abs_index = abs_indices[local_index]
+                if local_board.x_mask & (1 << local_index):
+                    board_hash ^= CELL_KEYS[Board.X][abs_index]
+                elif local_board.o_mask & (1 << local_index):
+                    board_hash ^= CELL_KEYS[Board.O][abs_index]
+
+    if global_board.next_player == Board.O:
+        board_hash ^= SIDE_KEY
+    if global_board.forced_board is not None:
+        board_hash ^= FORCED_BOARD_KEYS[global_board.forced_board]
+    return board_hash
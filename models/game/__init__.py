@@ -2,6 +2,7 @@ from .Board import Board
 from .Game import Game
 from .GlobalBoard import GlobalBoard
 from .LocalBoard import LocalBoard
+from .BoardBatch import BoardBatch
 from .Experiment import Experiment
 from .Move import Move
 from .Player import Player
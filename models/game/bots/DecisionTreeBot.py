@@ -1,21 +1,22 @@
 from models.game.bots.MinimaxBot import MinimaxBot
-from models.data.BoardDataModel import BoardDataModel
+from models.data.BoardDataModel import BoardDataModel, score_boards
 import weka.core.serialization as serialization
 from weka.classifiers import Classifier
 
 
 class DecisionTreeBot(MinimaxBot):
-    def __init__(self, number, name=None):
+    def __init__(self, number, time_limit=10, name=None):
         """
         Minimax bot which uses a decision tree to score board states
         The decision tree outputs one of ten classes.  The higher the class number, the better the board state for X
 
         :param number:  Board.X for player1 or Board.O for player2
+        :param time_limit: the maximum time that this bot can take to decide a move, in seconds
         :param name: A descriptive name for the Bot
         """
         if name is None:
             name = "DTree Bot"
-        MinimaxBot.__init__(self, number, name=name)
+        MinimaxBot.__init__(self, number, time_limit, name=name, batch_leaves=True)
         self.player_type = 'dtree minimax'
 
         objects = serialization.read_all("models/game/bots/weka_models/j48_default.model")
@@ -31,7 +32,13 @@ class DecisionTreeBot(MinimaxBot):
         except Exception:
             print("Error in Decision-Tree Classifier!!")
             category = 5
-        #  converts the class value into a numeric score between -1 and 1.   E.g. class 1 gets converted to -0.90, class 3 is converted to -0.50, class 10 is converted to 0.90, etc.
-        score = ((category - 5.0) / 5.0) - 0.1
+        return self._to_score(category)
+
+    def compute_scores(self, boards):
+        # boards the classifier fails on (see compute_score) are given class 5, like in compute_score
+        return score_boards(self.classifier, boards, True, self._to_score, default=5)
 
-        return score
+    @staticmethod
+    def _to_score(category):
+        #  converts the class value into a numeric score between -1 and 1.   E.g. class 1 gets converted to -0.90, class 3 is converted to -0.50, class 10 is converted to 0.90, etc.
+        return ((category - 5.0) / 5.0) - 0.1
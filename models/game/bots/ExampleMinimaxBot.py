@@ -10,17 +10,18 @@ class ExampleMinimaxBot(MinimaxBot):
     the cells of the board and divides by a regularizing constant.
     The scoring function doesn't make any sense.  It just shows how to compute a score if you have a vector of weights
     """
-    def __init__(self, number, max_depth=5, name=None):
+    def __init__(self, number, time_limit=10, max_depth=5, name=None):
         """
         The init method should follow this pattern.  Just change the name of the bot.
 
         :param number:  Board.X for player1 or Board.O for player2
+        :param time_limit: the maximum time that this bot can take to decide a move, in seconds
         :param max_depth:  The maximum depth of the lookahead
         :param name: A descriptive name for the Bot
         """
         if name is None:
             name = "Example Minimax"
-        MinimaxBot.__init__(self, number, max_depth, name=name)
+        MinimaxBot.__init__(self, number, time_limit, max_depth, name=name)
         self.player_type = 'example minimax'
 
     def compute_score(self, board):
@@ -1,29 +1,109 @@
-import random
-from .Bot import Bot
+import random, timeit
+import concurrent.futures
+from .TimeLimitedBot import TimeLimitedBot
 from models.game.Board import Board
+from .TranspositionTable import TranspositionTable
+from .MoveOrdering import MoveOrdering
+from services import ApplicationStatusService, SearchPoolService
 
 # TODO: consider experimenting with some more aggressive pruning.  Perhaps in a child bot?
 
 
-class MinimaxBot(Bot):
+class _SearchTimeout(Exception):
+    """ Raised inside the search when the deadline of the current move has passed """
+    pass
+
+
+class MinimaxBot(TimeLimitedBot):
     """ Base class for bots that perform a minimax search with a-B pruning
 
     This bot works by performing an iterative-deepening minimax search of the game tree until time runs out.
-    Standard alpha-beta pruning is used to reduce the size of the search space
+    Standard alpha-beta pruning is used to reduce the size of the search space.  Each iteration searches one ply
+    deeper than the last, starting from the best move of the previous iteration.  When the time limit is reached in the
+    middle of an iteration, that iteration is abandoned and the move from the last completed iteration is played
+
+    Variants of this bot can be implemented by creating a child class which overrides the compute_score() method.
+    Bots whose scores are expensive to compute one at a time (e.g. a Weka classifier, which costs a call into the JVM
+    per board) can also override compute_scores() and pass batch_leaves=True.  At nodes one ply above the horizon, once
+    the first move has failed to cause a cutoff, the leaves below the remaining moves are scored together with one call
+    to compute_scores()
+
+    Search results (including leaf scores) are kept in a TranspositionTable keyed by the board's hash, so positions
+    reached through different move orders are only searched and scored once.  The table persists between moves
+
+    The moves of each node are ordered by a MoveOrdering object (tactical moves, killer moves and the history heuristic
+    by default).  The nodes, cutoffs and leaf evaluations of the most recent search are counted in 'nodes', 'cutoffs'
+    and 'leaf_evaluations', so the effect of the ordering on the size of the search can be measured
+
+    Two search algorithms are available, selected by the 'search' attribute:
+        ALPHA_BETA: plain alpha-beta search with separate _max and _min functions
+        PVS: principal variation search in negamax form.  The first move of each node is searched with the full window
+            and the others with a null window, which only proves that they are no better; a move is re-searched with
+            the full window only when that proof fails.  Each iteration after the first starts with an aspiration
+            window of +/- aspiration_window around the score of the previous iteration, widened if the score falls
+            outside it
 
-    Variants of this bot can be implemented by creating a child class which overrides the compute_score() method
+    With workers > 0, the root moves of each iteration are searched in parallel by a pool of worker processes (see
+    SearchPoolService).  The first root move is searched alone to establish a score; the others are then handed out
+    to the workers as they become free, each with the best score found so far as its alpha bound.  The bounds only
+    prune, so with cold transposition tables (a new pool) the parallel search picks the same move with the same score
+    as a cold serial search at the same depth.  Pooled workers keep their tables from earlier moves and games, and
+    stored results of deeper searches can then change the scores (as they can in a serial search with a warm table).
+    Worker processes build their own copy of the bot as SubClass(number), so a subclass used with workers must be
+    constructible that way.  The search settings of the bot (see worker_settings) are sent along with each root move
+    and applied to the copy, so the workers search exactly like the bot would
     """
-    def __init__(self, number, max_depth=4, name=None):
+    ALPHA_BETA = 'alphabeta'
+    PVS = 'pvs'
+    _NULL_WINDOW = 1e-6  # width of the windows used by PVS to test whether a move beats the best score so far
+    # leaf scores are clamped inside (-1, 1), which is reserved for finished games, so that a search only stops early
+    # (and only prefers a lost game to a bad position) on results that are proven
+    _MAX_LEAF_SCORE = 0.99
+
+    def __init__(self, number, time_limit=10, max_depth=None, name=None, table_megabytes=64,
+                 replacement_policy=TranspositionTable.DEPTH_PREFERRED, move_ordering=None, search=ALPHA_BETA,
+                 aspiration_window=0.25, workers=0, batch_leaves=False):
         """
 
         :param number:  Board.X for player1 or Board.O for player2
+        :param time_limit: the maximum time that this bot can take to decide a move, in seconds
+        :param max_depth: optional limit on the depth of the iterative deepening.  None searches until time runs out
         :param name: A descriptive name for the Bot
+        :param table_megabytes: memory cap of the transposition table.  0 disables the table
+        :param replacement_policy: the TranspositionTable replacement policy
+        :param move_ordering: the MoveOrdering used to order the moves of each node.  Defaults to MoveOrdering().
+            Pass MoveOrdering(static_score=MoveOrdering.cheap_score) to also order quiet moves by a cheap static score
+        :param search: the search algorithm, MinimaxBot.ALPHA_BETA or MinimaxBot.PVS
+        :param aspiration_window: half-width of the PVS aspiration window.  None searches every iteration with a full
+            window
+        :param workers: the number of worker processes searching root moves in parallel.  0 searches in this process
+        :param batch_leaves: score the leaves of nodes one ply above the horizon in batches with compute_scores().  This
+            also scores some leaves that alpha-beta would have pruned, so it only pays off if batches are much cheaper
         """
+        if search not in (MinimaxBot.ALPHA_BETA, MinimaxBot.PVS):
+            raise Exception("Unknown minimax search algorithm: %s" % search)
         if name is None:
             name = "Minimax Bot"
-        Bot.__init__(self, number, name=name)
+        TimeLimitedBot.__init__(self, number, time_limit, name=name)
         self.player_type = 'minimax bot'
         self.max_depth = max_depth
+        self.completed_depth = 0  # the depth of the last completed iteration of the most recent search
+        self.table_megabytes = table_megabytes
+        self.replacement_policy = replacement_policy
+        self.transposition_table = None
+        if table_megabytes:
+            self.transposition_table = TranspositionTable(table_megabytes, replacement_policy)
+        self.move_ordering = move_ordering if move_ordering is not None else MoveOrdering()
+        self.search = search
+        self.aspiration_window = aspiration_window
+        self.workers = workers
+        self.batch_leaves = batch_leaves
+        self._frontier_scores = {}  # scores of the leaves below the current frontier node, keyed by hash
+        self.nodes = 0
+        self.cutoffs = 0
+        self.leaf_evaluations = 0
+        self.re_searches = 0
+        self._deadline = None
 
     def is_bot(self):
         return True
@@ -35,11 +115,195 @@ class MinimaxBot(Bot):
         :param valid_moves: valid moves for the agent
         :return: the Move object recommended for this agent
         """
-        alpha = -float('inf')
-        beta = float('inf')
-        score, selected_move = self._max(board, valid_moves, alpha, beta, self.max_depth)
+        deadline = timeit.default_timer() + self.time_limit
+        # the search makes and unmakes moves in place, so it runs on a private copy of the game board
+        search_board = board.clone()
+        if self.transposition_table is not None:
+            self.transposition_table.new_search()
+        self.move_ordering.new_search()
+        self.reset_counters()
+
+        # the game cannot last longer than the number of empty cells, so deeper iterations would not change the result
+        depth_limit = 81 - board.total_moves
+        if self.max_depth is not None:
+            depth_limit = min(depth_limit, self.max_depth)
+
+        ordered_moves = list(valid_moves)
+        selected_move = ordered_moves[0]
+        score = None
+        self.completed_depth = 0
+        for depth in range(1, depth_limit + 1):
+            # the first iteration always runs to completion, so that the move is based on at least a 1-ply search
+            self._deadline = deadline if depth > 1 else None
+            try:
+                if self.workers:
+                    score, selected_move = self._parallel_root(search_board, ordered_moves, depth, self._deadline)
+                elif self.search == MinimaxBot.PVS:
+                    score, selected_move = self._aspiration_search(search_board, ordered_moves, depth, score)
+                else:
+                    score, selected_move = self._max(search_board, ordered_moves, -float('inf'), float('inf'), depth)
+            except _SearchTimeout:
+                break
+            finally:
+                self._deadline = None
+            self.completed_depth = depth
+
+            # search the best move first in the next iteration
+            ordered_moves = self._order_moves(ordered_moves, selected_move)
+            # stop early if the game is decided within the horizon, or if time has run out
+            if score >= 1 or score <= -1 or timeit.default_timer() >= deadline:
+                break
         return selected_move
 
+    def search_root_move(self, board, move, depth, alpha, time_left=None):
+        """
+        Searches a single root move.  Used by the worker processes of a parallel search
+        :param board: the GlobalBoard of the root.  It is searched with make_move/unmake_move and is left unchanged
+        :param move: the root move to search
+        :param depth: the depth of the search, counting the root move
+        :param alpha: the best score found for the root so far.  A move that cannot beat it is only searched far
+            enough to prove that
+        :param time_left: the number of seconds before the search is abandoned, or None
+        :return: tuple (value, nodes, cutoffs, leaf_evaluations), or None if time ran out.  The value is exact if it is
+            greater than alpha, and an upper bound otherwise
+        """
+        self.reset_counters()
+        self._deadline = None if time_left is None else timeit.default_timer() + time_left
+        token = board.make_move(move)
+        try:
+            if self.search == MinimaxBot.PVS:
+                value = -self._pvs(board, board.get_valid_moves(move), -float('inf'), -alpha, depth - 1)[0]
+            else:
+                value = self._min(board, board.get_valid_moves(move), alpha, float('inf'), depth - 1)[0]
+        except _SearchTimeout:
+            return None
+        finally:
+            board.unmake_move(token)
+            self._deadline = None
+        return value, self.nodes, self.cutoffs, self.leaf_evaluations
+
+    def worker_settings(self):
+        """
+        Collects the settings that the worker processes of a parallel search need to search like this bot
+        :return: picklable dictionary for apply_worker_settings
+        """
+        ordering = self.move_ordering
+        return {
+            'search': self.search,
+            'batch_leaves': self.batch_leaves,
+            'table': (self.table_megabytes, self.replacement_policy),
+            'move_ordering': (type(ordering), ordering.tactical, ordering.use_killers, ordering.use_history,
+                              ordering.static_score),
+        }
+
+    def apply_worker_settings(self, settings):
+        """
+        Makes this bot (a worker process's copy) search like the bot of a parallel search.  The transposition table and
+        the move ordering are only rebuilt if their settings changed, so they stay warm from one move to the next.  A
+        MoveOrdering subclass used with workers must accept the arguments of MoveOrdering.__init__
+        :param settings: dictionary returned by worker_settings
+        :return: None
+        """
+        self.search = settings['search']
+        self.batch_leaves = settings['batch_leaves']
+        if settings['table'] != (self.table_megabytes, self.replacement_policy):
+            self.table_megabytes, self.replacement_policy = settings['table']
+            self.transposition_table = None
+            if self.table_megabytes:
+                self.transposition_table = TranspositionTable(self.table_megabytes, self.replacement_policy)
+        ordering_class, tactical, killers, history, static_score = settings['move_ordering']
+        if settings['move_ordering'] != self.worker_settings()['move_ordering']:
+            self.move_ordering = ordering_class(tactical=tactical, killers=killers, history=history,
+                                                static_score=static_score)
+
+    def _parallel_root(self, board, valid_moves, depth, deadline):
+        """
+        Private function which searches the root with the worker pool.  See the class docstring
+        :param deadline: the time at which the search is abandoned, or None
+        :return: the value (score) of the best move and the move object itself
+        """
+        table_move = None
+        if self.transposition_table is not None:
+            entry = self.transposition_table.probe(board.hash)
+            if entry is not None:
+                table_move = entry.move
+        moves = self.move_ordering.order(board, valid_moves, table_move, depth)
+
+        pool = SearchPoolService.get_pool(self.workers)
+        bot_class_path = type(self).__module__ + '.' + type(self).__name__
+        encoded_board = board.to_bytes()
+        settings = self.worker_settings()
+
+        def submit(index, move_alpha):
+            time_left = None if deadline is None else deadline - timeit.default_timer()
+            return pool.submit(SearchPoolService.search_root_move, bot_class_path, self.number, settings,
+                               encoded_board, moves[index].abs_index, depth, move_alpha, time_left)
+
+        values = [None] * len(moves)
+        exact = [False] * len(moves)
+        alpha = -float('inf')
+        pending = {}
+        next_index = 0
+        while next_index < len(moves) or pending:
+            # the first move is searched alone, so that the other moves can be searched with its score as a bound
+            while next_index < len(moves) and len(pending) < self.workers \
+                    and (next_index == 0 or values[0] is not None):
+                pending[submit(next_index, alpha)] = (next_index, alpha)
+                next_index += 1
+
+            timeout = None if deadline is None else max(0, deadline - timeit.default_timer())
+            done = concurrent.futures.wait(list(pending), timeout, concurrent.futures.FIRST_COMPLETED)[0]
+            results = [future.result() for future in done]
+            if not done or None in results or (deadline is not None and ApplicationStatusService.terminated):
+                for future in pending:
+                    future.cancel()
+                raise _SearchTimeout()
+            for future, result in zip(done, results):
+                index, move_alpha = pending.pop(future)
+                values[index] = result[0]
+                exact[index] = result[0] > move_alpha
+                alpha = max(alpha, result[0])
+                self.nodes += result[1]
+                self.cutoffs += result[2]
+                self.leaf_evaluations += result[3]
+
+        # the serial search picks the first move (in search order) with the best score.  A move that was searched with
+        # the best score as its bound only proved that it is no better, so it is searched again to see if it is as good
+        best_index = next(index for index in range(0, len(moves)) if exact[index] and values[index] == alpha)
+        for index in range(0, best_index):
+            if values[index] == alpha:
+                result = submit(index, alpha - MinimaxBot._NULL_WINDOW).result()
+                if result is None:
+                    raise _SearchTimeout()
+                self.nodes += result[1]
+                self.cutoffs += result[2]
+                self.leaf_evaluations += result[3]
+                if result[0] >= alpha:
+                    best_index = index
+                    break
+
+        self._store(board, depth, -float('inf'), float('inf'), alpha, moves[best_index])
+        return alpha, moves[best_index]
+
+    def reset_counters(self):
+        """
+        Resets the node, cutoff, leaf evaluation and re-search counters.  compute_next_move resets them at the start of
+        each search
+        :return: None
+        """
+        self.nodes = 0
+        self.cutoffs = 0
+        self.leaf_evaluations = 0
+        self.re_searches = 0
+
+    def _check_deadline(self):
+        """
+        Private function which aborts the search once the deadline of the current iteration has passed
+        """
+        if self._deadline is not None and (timeit.default_timer() >= self._deadline
+                                           or ApplicationStatusService.terminated):
+            raise _SearchTimeout()
+
     def _max(self, board, valid_moves, alpha, beta, max_depth):
         """
         Private function which computes the move that a rational maximizing player would choose
@@ -49,6 +313,8 @@ class MinimaxBot(Bot):
         :param beta: the current value of beta (the best score that MIN can guarantee so far)
         :return: the value (score) of the best move and the move object itself
         """
+        self._check_deadline()
+        self.nodes += 1
         if board.board_completed:  # termination test
             if board.winner == Board.EMPTY or board.winner == Board.CAT:
                 return 0, None
@@ -56,33 +322,49 @@ class MinimaxBot(Bot):
                 return 1, None
             else:
                 return -1, None
-        elif max_depth == 0:
-            # scores are computed from the perspective of the 'X' player, so they need to be flipped if our bot is 'O'
-            if self.number == Board.X:
-                return self.compute_score(board), None
-            else:
-                return -self.compute_score(board), None
+
+        table = self.transposition_table
+        table_move = None
+        if table is not None:
+            entry = table.probe(board.hash)
+            if entry is not None:
+                if entry.depth >= max_depth and self._entry_cutoff(entry, alpha, beta):
+                    return entry.value, entry.move
+                table_move = entry.move
+
+        if max_depth == 0:
+            return self._score_leaf(board), None
 
         a, b = alpha, beta
 
         value = -float('inf')
         best_move = None
-        for move in valid_moves:
-            child_board = board.clone()
-            child_board.make_move(move)
-            move_value, minimizing_move = self._min(child_board, child_board.get_valid_moves(move), a, b, max_depth-1)
+        ordered_moves = self.move_ordering.order(board, valid_moves, table_move, max_depth)
+        for i, move in enumerate(ordered_moves):
+            if i == 1 and max_depth == 1 and self.batch_leaves:
+                # the first move did not cause a cutoff, so the other leaves are likely to be needed too
+                self._score_frontier(board, ordered_moves[1:])
+            token = board.make_move(move)
+            move_value, minimizing_move = self._min(board, board.get_valid_moves(move), a, b, max_depth-1)
+            board.unmake_move(token)
             if move_value > value:
                 value = move_value
                 best_move = move
 
             if value >= b:
+                self.cutoffs += 1
+                self.move_ordering.record_cutoff(board, move, max_depth)
+                self._store(board, max_depth, alpha, beta, value, best_move)
                 return value, best_move
 
             a = max(a, move_value)
 
+        self._store(board, max_depth, alpha, beta, value, best_move)
         return value, best_move
 
     def _min(self, board, valid_moves, alpha, beta, max_depth):
+        self._check_deadline()
+        self.nodes += 1
         # test for stopping condition
         if board.board_completed:
             if board.winner == Board.EMPTY:
@@ -91,38 +373,217 @@ class MinimaxBot(Bot):
                 return 1, None
             else:
                 return -1, None
-        elif max_depth == 0:
-            # scores are computed from the perspective of the 'X' player, so they need to be flipped if our bot is 'O'
-            if self.number == Board.X:
-                return self.compute_score(board), None
-            else:
-                return -self.compute_score(board), None
+
+        table = self.transposition_table
+        table_move = None
+        if table is not None:
+            entry = table.probe(board.hash)
+            if entry is not None:
+                if entry.depth >= max_depth and self._entry_cutoff(entry, alpha, beta):
+                    return entry.value, entry.move
+                table_move = entry.move
+
+        if max_depth == 0:
+            return self._score_leaf(board), None
 
         a, b = alpha, beta
 
         value = float('inf')
         best_move = None
-        for move in valid_moves:
-            child_board = board.clone()
-            child_board.make_move(move)
-            move_value, maximizing_move = self._max(child_board, child_board.get_valid_moves(move), a, b, max_depth - 1)
+        ordered_moves = self.move_ordering.order(board, valid_moves, table_move, max_depth)
+        for i, move in enumerate(ordered_moves):
+            if i == 1 and max_depth == 1 and self.batch_leaves:
+                # the first move did not cause a cutoff, so the other leaves are likely to be needed too
+                self._score_frontier(board, ordered_moves[1:])
+            token = board.make_move(move)
+            move_value, maximizing_move = self._max(board, board.get_valid_moves(move), a, b, max_depth - 1)
+            board.unmake_move(token)
             if move_value < value:
                 value = move_value
                 best_move = move
 
             if value <= a:
+                self.cutoffs += 1
+                self.move_ordering.record_cutoff(board, move, max_depth)
+                self._store(board, max_depth, alpha, beta, value, best_move)
                 return value, best_move
 
             b = min(b, move_value)
 
+        self._store(board, max_depth, alpha, beta, value, best_move)
+        return value, best_move
+
+    def _aspiration_search(self, board, valid_moves, depth, previous_score):
+        """
+        Private function which runs one PVS iteration at the root, starting with a narrow window around the score of
+        the previous iteration
+        :param previous_score: the score of the previous iteration, or None
+        :return: the value (score) of the best move and the move object itself
+        """
+        if previous_score is None or self.aspiration_window is None:
+            return self._pvs(board, valid_moves, -float('inf'), float('inf'), depth)
+
+        alpha = previous_score - self.aspiration_window
+        beta = previous_score + self.aspiration_window
+        while True:
+            value, best_move = self._pvs(board, valid_moves, alpha, beta, depth)
+            # a score outside the window is only a bound, so the side it fell out of is opened up and searched again
+            if value <= alpha:
+                alpha = -float('inf')
+            elif value >= beta:
+                beta = float('inf')
+            else:
+                return value, best_move
+            self.re_searches += 1
+
+    def _pvs(self, board, valid_moves, alpha, beta, max_depth):
+        """
+        Private function which performs a principal variation search in negamax form.  Values are from the perspective
+        of the player to move on the board (the transposition table stores them from the bot's perspective)
+        :param board: GlobalBoard object representing the current state
+        :param valid_moves: list of valid moves that can be made on the board object
+        :param alpha: the best score the player to move can guarantee so far
+        :param beta: the best score the opponent can guarantee so far (negated)
+        :return: the value (score) of the best move and the move object itself
+        """
+        self._check_deadline()
+        self.nodes += 1
+        sign = 1 if board.next_player == self.number else -1
+        if board.board_completed:
+            if board.winner == Board.EMPTY:
+                return 0, None
+            return (1 if board.winner == self.number else -1) * sign, None
+
+        # the window from the bot's perspective, for the transposition table
+        bot_alpha, bot_beta = (alpha, beta) if sign == 1 else (-beta, -alpha)
+        table_move = None
+        if self.transposition_table is not None:
+            entry = self.transposition_table.probe(board.hash)
+            if entry is not None:
+                if entry.depth >= max_depth and self._entry_cutoff(entry, bot_alpha, bot_beta):
+                    return sign * entry.value, entry.move
+                table_move = entry.move
+
+        if max_depth == 0:
+            return sign * self._score_leaf(board), None
+
+        a = alpha
+        value = -float('inf')
+        best_move = None
+        ordered_moves = self.move_ordering.order(board, valid_moves, table_move, max_depth)
+        for i, move in enumerate(ordered_moves):
+            if i == 1 and max_depth == 1 and self.batch_leaves:
+                # the first move did not cause a cutoff, so the other leaves are likely to be needed too
+                self._score_frontier(board, ordered_moves[1:])
+            token = board.make_move(move)
+            child_moves = board.get_valid_moves(move)
+            if best_move is None:
+                move_value = -self._pvs(board, child_moves, -beta, -a, max_depth - 1)[0]
+            else:
+                move_value = -self._pvs(board, child_moves, -a - MinimaxBot._NULL_WINDOW, -a, max_depth - 1)[0]
+                if a < move_value < beta:
+                    self.re_searches += 1
+                    move_value = -self._pvs(board, child_moves, -beta, -a, max_depth - 1)[0]
+            board.unmake_move(token)
+
+            if move_value > value:
+                value = move_value
+                best_move = move
+            if value >= beta:
+                self.cutoffs += 1
+                self.move_ordering.record_cutoff(board, move, max_depth)
+                break
+            a = max(a, value)
+
+        self._store(board, max_depth, bot_alpha, bot_beta, sign * value, best_move)
         return value, best_move
 
+    def _score_leaf(self, board):
+        """
+        Private function which scores a board at the search horizon from the perspective of this bot.
+        The score is stored in the transposition table so that the board is only scored once
+        """
+        # scores are computed from the perspective of the 'X' player, so they need to be flipped if our bot is 'O'
+        score = self._frontier_scores.pop(board.hash, None)
+        if score is None:
+            score = self.compute_score(board)
+            self.leaf_evaluations += 1
+        # some of the Weka bots map their lowest class to -1.1
+        score = max(-MinimaxBot._MAX_LEAF_SCORE, min(MinimaxBot._MAX_LEAF_SCORE, score))
+        if self.number != Board.X:
+            score = -score
+        if self.transposition_table is not None:
+            self.transposition_table.store(board.hash, 0, TranspositionTable.EXACT, score, None)
+        return score
+
+    def _score_frontier(self, board, valid_moves):
+        """
+        Private function which scores the leaves below some moves of a node one ply above the horizon with a single call
+        to compute_scores().  _score_leaf picks the scores up as the moves are searched
+        """
+        self._frontier_scores = {}
+        leaves = []
+        for move in valid_moves:
+            token = board.make_move(move)
+            # finished games are scored by the result, and exact table entries are returned without scoring the leaf
+            if not board.board_completed and board.hash not in self._frontier_scores:
+                entry = self.transposition_table.probe(board.hash) if self.transposition_table is not None else None
+                if entry is None or entry.bound != TranspositionTable.EXACT:
+                    self._frontier_scores[board.hash] = None
+                    leaves.append(board.clone())
+            board.unmake_move(token)
+
+        if leaves:
+            for leaf, score in zip(leaves, self.compute_scores(leaves)):
+                self._frontier_scores[leaf.hash] = score
+            self.leaf_evaluations += len(leaves)
+
+    @staticmethod
+    def _entry_cutoff(entry, alpha, beta):
+        """
+        Private function which checks whether a transposition table entry settles a node searched with the given window
+        :param entry: the TableEntry of the node, searched to a sufficient depth
+        :return: True if the entry's value can be returned without searching the node
+        """
+        if entry.bound == TranspositionTable.EXACT:
+            return True
+        elif entry.bound == TranspositionTable.LOWER_BOUND:
+            return entry.value >= beta
+        return entry.value <= alpha
+
+    @staticmethod
+    def _order_moves(valid_moves, first_move):
+        """
+        Private function which moves the best move found by an earlier search of the node to the front
+        :param valid_moves: list of valid moves
+        :param first_move: the move to search first, or None
+        :return: list of the valid moves in search order
+        """
+        if first_move is None:
+            return valid_moves
+        return [first_move] + [move for move in valid_moves if move is not first_move]
+
+    def _store(self, board, max_depth, alpha, beta, value, best_move):
+        """
+        Private function which records the result of searching a node with the window (alpha, beta)
+        """
+        if self.transposition_table is None:
+            return
+        if value <= alpha:
+            bound = TranspositionTable.UPPER_BOUND
+        elif value >= beta:
+            bound = TranspositionTable.LOWER_BOUND
+        else:
+            bound = TranspositionTable.EXACT
+        self.transposition_table.store(board.hash, max_depth, bound, value, best_move)
+
     def compute_score(self, board):
         """
         Returns a heuristic score for the board that (ideally) measures how "good" the board is from the perspective of
         the 'X' player.  For the Minimax search to perform correctly, better boards MUST receive higher scores.
         In the framework of this application, scores should fall in the range [-1, 1], where -1 represents O winning,
-        1 represents a win for X, and 0 represents a tie.
+        1 represents a win for X, and 0 represents a tie.  The search clamps scores strictly inside (-1, 1), because only
+        finished games are certain to be won or lost.
 
         :param board: the GlobalBoard object to score
         :return: a float in the range [-1, 1] that represents the "goodness" of the given board state from the perspective of 'X'.
@@ -132,5 +593,15 @@ class MinimaxBot(Bot):
 
         return score
 
+    def compute_scores(self, boards):
+        """
+        Scores a list of boards at once (see compute_score).  Child classes using batch_leaves should override this
+        method with a version that is cheaper than scoring the boards one by one
+
+        :param boards: list of GlobalBoard objects to score
+        :return: list of floats in the range [-1, 1], one per board, from the perspective of 'X'
+        """
+        return [self.compute_score(board) for board in boards]
+
     def setup_bot(self, game):
         pass
@@ -1,20 +1,21 @@
 from models.game.bots.MinimaxBot import MinimaxBot
-from models.data.BoardDataModel import BoardDataModel
+from models.data.BoardDataModel import BoardDataModel, score_boards
 import weka.core.serialization as serialization
 from weka.classifiers import Classifier
 
 
 class ModelTreeBot(MinimaxBot):
-    def __init__(self, number, name=None):
+    def __init__(self, number, time_limit=10, name=None):
         """
         Minimax bot which uses a Model Tree to score board states
 
         :param number:  Board.X for player1 or Board.O for player2
+        :param time_limit: the maximum time that this bot can take to decide a move, in seconds
         :param name: A descriptive name for the Bot
         """
         if name is None:
             name = "Model Tree Bot"
-        MinimaxBot.__init__(self, number, name=name)
+        MinimaxBot.__init__(self, number, time_limit, name=name, batch_leaves=True)
         self.player_type = 'modeltree minimax'
 
         objects = serialization.read_all("models/game/bots/weka_models/model-tree.model")
@@ -23,8 +24,13 @@ class ModelTreeBot(MinimaxBot):
     def compute_score(self, board):
         data_model = BoardDataModel(board)
         weka_instance = data_model.get_weka_instance(categorical=False)
-        score = self.classifier.classify_instance(weka_instance)
+        return self._to_score(self.classifier.classify_instance(weka_instance))
 
+    def compute_scores(self, boards):
+        return score_boards(self.classifier, boards, False, self._to_score)
+
+    @staticmethod
+    def _to_score(score):
         # ensure score doesnt exceed legal range (1 and -1 are reserved for win/loss scores)
         score = min(score, 0.99)
         score = max(score, -0.99)
@@ -1,9 +1,11 @@
-import random, numpy, timeit
+import random, numpy, time, collections
 from .TimeLimitedBot import TimeLimitedBot
 from ..Board import Board
-from services import ApplicationStatusService
+from ..Move import Move
+from ..GlobalBoard import GlobalBoard
+from ..BoardBatch import BoardBatch
+from services import ApplicationStatusService, SearchPoolService
 
-# TODO: Save MCTS tree and reuse nodes as moves are chosen
 """
     Some ideas on this implementation:
     (Written at 3:04 am on a Wednesday so take these with a grain or two of salt)
@@ -17,172 +19,496 @@ from services import ApplicationStatusService
 class MonteCarloBot(TimeLimitedBot):
     """
     This bot performs a Monte Carlo Tree Search to find a move
+
+    The tree is kept between moves.  When the bot is asked for its next move, the node of the current position (the
+    grandchild of the previous root reached by the bot's move and the opponent's reply) becomes the new root, so the
+    playouts already recorded below it are not wasted.  The rest of the old tree is released
+
+    The tree is stored in a _Tree (parallel NumPy arrays indexed by node number) rather than as node objects, and nodes
+    do not keep boards.  Each iteration makes the moves of the selected path on a single copy of the root board and
+    unmakes them afterwards
+
+    With workers > 0, the search is root-parallel: each of the worker processes (see SearchPoolService) grows its own
+    tree from the current position with its own random seed until the time limit, and the visit, win and tie counts of
+    the root moves of all of the trees are added up to choose the move.  Worker processes build their own copy of the
+    bot, so a subclass used with workers must be constructible as SubClass(player); the search settings of the bot
+    (see worker_settings) are sent along with each search and applied to the copy.  Reusing the trees across moves is
+    opportunistic: the pool does not pin a tree to a process, and a tree is only reused when its next task runs in the
+    process that grew it
+
+    Each expansion can be followed by several random playouts from the new node (playouts_per_expansion).  They are
+    played in lockstep as a BoardBatch, which replaces the Python loop over the moves of one game by array operations
+    over all of the games.  Batches only beat single playouts once they are a few dozen games wide
+
+    Expanding a node only records its legal moves.  The child node of a move is created the first time the move is
+    selected, in random order, so the first playouts below a node do not pay for all of its children.  With progressive
+    widening (widening_exponent), a node with n playouts only gets up to widening_constant * n ** widening_exponent
+    children, so UCT focuses on a few moves of nodes with many legal moves until they have been visited more often
+
+    The search is an MCTS-Solver: a node whose game is over has a proven result, and proofs are passed up the tree with
+    minimax rules (a node is won if one of its moves leads to a lost node, and lost or drawn once all of its moves are
+    proven and none of them wins).  Selection skips proven children, the search stops as soon as the root is proven,
+    and a proven win at the root is always chosen
     """
-    def __init__(self, player, time_limit=10):
+    def __init__(self, player, time_limit=10, workers=0, playouts_per_expansion=1, widening_constant=1.0,
+                 widening_exponent=None):
         """
         Creates a new Monte Carlo Tree Search Bot
         :param player: the player that this bot will play as.  Either Board.X or Board.O
         :param time_limit: The maximum computation time, in seconds
+        :param workers: the number of worker processes growing trees in parallel.  0 searches in this process
+        :param playouts_per_expansion: the number of random games played from each newly expanded node.  With more
+            than one, the games are played together by a BoardBatch
+        :param widening_constant: see widening_exponent
+        :param widening_exponent: if set, a node with n playouts has at most widening_constant * n ** widening_exponent
+            children (e.g. 0.5).  None gives every move of a node a child before UCT chooses between them
         """
         TimeLimitedBot.__init__(self, player, time_limit, "MCTS Bot")
         self.time_limit = time_limit
         self.player_type = 'mcts bot'
         self.game = None  # we'll set this in the setup function
+        self.workers = workers
+        self.playouts_per_expansion = playouts_per_expansion
+        self.widening_constant = widening_constant
+        self.widening_exponent = widening_exponent
+        self.playouts = 0  # the number of playouts recorded at the root by the most recent search (over all trees)
+        self.reused_playouts = 0  # the number of those playouts that were inherited from the previous search
+        self._tree = None  # tree of the previous search
+        self._tree_moves = []  # the moves that had been played at the root of self._tree
 
         random.seed()
+        self._rng = numpy.random.RandomState()  # for the playouts of a BoardBatch
 
     def setup_bot(self, game):
         self.game = game
+        self._tree = None
 
     def compute_next_move(self, board, valid_moves):
-        begin = timeit.default_timer()
-        last_move = None
-        if len(self.game.moves) > 0:
-            last_move = self.game.moves[-1]
-        root_node = _Node(self.game.board, last_move)
-        while (timeit.default_timer() - begin) < self.time_limit and not ApplicationStatusService.terminated:
-            selected_node = root_node.select_node()
-            expanded_node = selected_node.expand_node()
-            expanded_node.do_playout()
+        if self.workers:
+            root_moves = self._parallel_search()
+        else:
+            tree = self._grow_tree(self.game.board, self.game.moves, time.time() + self.time_limit)
+            root_moves = tree.root_statistics()
+            self.playouts = int(tree.visits[0])
 
         best_score = -100
         selected_move = None
-        for child in root_node.children:
-            # check if the move wins the game for this player
-            dummy_board = self.game.board.clone()
-            dummy_board.make_move(child.last_move)
-            if dummy_board.winner == self.number:
-                selected_move = child.last_move
-                break
-
-            if child.games_recorded == 0:  # a move with no recorded stats is treated like a draw
+        root_board = None
+        for move, total, wins, ties, proven in root_moves:
+            if proven is not None:
+                # the result of the move is known.  proven is from the opponent's perspective
+                if proven == -1:
+                    selected_move = move
+                    break
+                score = -2 if proven == 1 else 0
+            elif total == 0:
+                # a move that was never played might still win on the spot (with progressive widening, not every move
+                # of the root is played).  Otherwise it is treated like a draw
+                if root_board is None:
+                    root_board = self.game.board.clone()
+                token = root_board.make_move(move)
+                winner = root_board.winner
+                root_board.unmake_move(token)
+                if winner == self.number:
+                    selected_move = move
+                    break
                 score = 0
             else:
-                total = child.games_recorded
-                wins = child.wins_recorded
-                ties = child.ties_recorded
                 losses = total - wins - ties
 
                 score = -(wins - losses) / total  # reverse the sign of the score since the child node is the opponent
             if score > best_score:
                 best_score = score
-                selected_move = child.last_move
+                selected_move = move
         return selected_move
 
+    def worker_settings(self):
+        """
+        Collects the settings that the worker processes of a parallel search need to search like this bot
+        :return: picklable dictionary for apply_worker_settings
+        """
+        return {
+            'playouts_per_expansion': self.playouts_per_expansion,
+            'widening_constant': self.widening_constant,
+            'widening_exponent': self.widening_exponent,
+        }
 
-# private class for nodes in the Monte Carlo game tree
-class _Node(object):
-    def __init__(self, board, last_move, parent=None):
-        # setup variables needed to compute child nodes and update the nodes value
-        self.wins_recorded = 0
-        self.ties_recorded = 0
-        self.games_recorded = 0
-        self.board = board
-        self.last_move = last_move
-        self.player = Board.X
-        if last_move is not None and last_move.player == Board.X:
-            self.player = Board.O
-        self.parent = parent
-        self.is_leaf = True
+    def apply_worker_settings(self, settings):
+        """
+        Makes this bot (a worker process's copy) search like the bot of a parallel search
+        :param settings: dictionary returned by worker_settings
+        :return: None
+        """
+        self.playouts_per_expansion = settings['playouts_per_expansion']
+        self.widening_constant = settings['widening_constant']
+        self.widening_exponent = settings['widening_exponent']
 
-        self.children = []
+    def search_position(self, moves, deadline, seed=None):
+        """
+        Grows this bot's tree for the position reached by a sequence of moves.  Used by the worker processes of a
+        parallel search
+        :param moves: list of hash() values of the moves played so far, in order
+        :param deadline: the time.time() at which the search stops
+        :param seed: seed for the random playouts, or None
+        :return: tuple (root statistics, see _Tree.root_statistics, number of playouts reused from the previous search)
+        """
+        random.seed(seed)
+        self._rng.seed(None if seed is None else seed & 0xFFFFFFFF)
+        moves = [_MOVES[code] for code in moves]
+        board = GlobalBoard()
+        for move in moves:
+            board.make_move(move)
+        tree = self._grow_tree(board, moves, deadline)
+        return tree.root_statistics(), self.reused_playouts
 
-    def compute_uct_score(self, exploration_param=1.41421356):
+    def _grow_tree(self, board, moves, deadline):
         """
-        Computes the UCT1 value for this node
-        UCT1 = w / n  + c * sqrt( ln(N) / n)
-        where w = number of wins recorded for this node, n = number of playouts recorded for this node,
-        c = tunable exploration parameter ( default sqrt(2) ), and N = total playouts recorded for all nodes
-        :param exploration_param: the parameter c determining the strength of the exploration component of UCT1
-        :return: the UCT1 value of this node
+        Private function which runs the search until the deadline, starting from the tree of the previous search if it
+        reached the position
+        :param board: the GlobalBoard of the position to search.  It is left unchanged
+        :param moves: the moves played to reach the position
+        :param deadline: the time.time() at which the search stops
+        :return: the _Tree of the search
         """
+        last_move = moves[-1] if len(moves) > 0 else None
+        tree = self._reuse_tree(moves)
+        if tree is None:
+            tree = _Tree(board.next_player)
+        self.reused_playouts = int(tree.visits[0])
+        self._tree = tree
+        self._tree_moves = list(moves)
 
-        # if no playouts have been recorded, then this node gets the max value
-        if self.games_recorded == 0:
-            return float('inf')
+        # the tree works on its own copy of the board.  The search runs at least until the root has children, so that
+        # there is a move to choose even if the deadline has already passed, and stops early once the root is proven
+        root_board = board.clone()
+        while tree.first_child[0] < 0 or (time.time() < deadline and tree.proven[0] == _UNPROVEN
+                                          and not ApplicationStatusService.terminated):
+            self._run_iteration(tree, root_board, last_move)
+        return tree
 
-        # otherwise compute the score as normal
-        # follow the path back to the root node to get total number of playouts
-        root = self
-        while root.parent is not None:
-            root = root.parent
+    def _parallel_search(self):
+        """
+        Private function which grows one tree per worker process and adds up the statistics of their root moves
+        :return: list of (move, visits, wins, ties, proven) tuples, like _Tree.root_statistics
+        """
+        pool = SearchPoolService.get_pool(self.workers)
+        bot_class_path = type(self).__module__ + '.' + type(self).__name__
+        moves = [hash(move) for move in self.game.moves]
+        deadline = time.time() + self.time_limit
+        settings = self.worker_settings()
+        futures = [pool.submit(SearchPoolService.search_position, bot_class_path, self.number, slot, settings, moves,
+                               deadline, random.getrandbits(64))
+                   for slot in range(0, self.workers)]
 
-        total_playouts = root.games_recorded
-        return (self.wins_recorded / self.games_recorded) + exploration_param * numpy.sqrt( numpy.log(total_playouts) / self.games_recorded)
+        totals = collections.OrderedDict()
+        self.playouts = 0
+        self.reused_playouts = 0
+        for future in futures:
+            root_moves, reused_playouts = future.result()
+            self.reused_playouts += reused_playouts
+            for move, visits, wins, ties, proven in root_moves:
+                self.playouts += visits
+                total = totals.setdefault(move, [0, 0, 0, None])
+                total[0] += visits
+                total[1] += wins
+                total[2] += ties
+                if proven is not None:
+                    total[3] = proven  # a proof found by any of the trees holds for all of them
+        return [(move, visits, wins, ties, proven) for move, (visits, wins, ties, proven) in totals.items()]
 
-    def select_node(self):
+    def _run_iteration(self, tree, board, last_move):
         """
-        Selection phase of the MCTS algorithm
-        If the node is a leaf, then a random child is selected
-        Otherwise, successive child nodes are selected down to a leaf using UCT1 scores
-
-        :return: the selected node
+        Private function which runs one selection, expansion, playout and backpropagation step of the search
+        :param tree: the _Tree to grow
+        :param board: the board of the tree's root.  Moves are made on it during the iteration and unmade at the end
+        :param last_move: the last move played before the root position
+        :return: None
         """
-        if self.is_leaf:  # a node will be a leaf if it's a terminal state or if it has no expanded children
-            selection = self
-        else:
-            max_uct = -1
-            next_node_in_tree = None
-            for child in self.children:
-                child_uct = child.compute_uct_score()
-                if child_uct > max_uct:
-                    next_node_in_tree = child
-                    max_uct = child_uct
-            selection = next_node_in_tree.select_node()  # recursively descends to a leaf node
-
-        return selection
-
-    def expand_node(self):
-        """
-        Expansion phase of the MCTS algorithm.
-        If this node is terminal, then just return thiss node
-        Else If this node has at least one playout, create child nodes and randomly select one.
-        Otherwise, just return the current node
-        :return: the node selected for playout
-        """
-        if self.board.board_completed:
-            return self
-        elif self.games_recorded == 0:
-            return self
+        # selection: descend to a leaf with UCT1, avoiding proven nodes
+        node = 0
+        path = [0]
+        tokens = []
+        while tree.first_child[node] >= 0:
+            child = None
+            if tree.child_count[node] == tree.move_count[node] or not self._may_widen(tree, node):
+                child = tree.select_child(node)
+            if child is None:
+                # an untried move gets its child node, which is a leaf, the first time it is selected.  This is also
+                # the way out of an unproven node whose children are all proven
+                child = tree.reveal_child(node)
+            node = child
+            last_move = tree.get_move(node)
+            tokens.append(board.make_move(last_move))
+            path.append(node)
+
+        # expansion: a leaf which has been played out once records its moves, and one of them is played out
+        if not board.board_completed and tree.visits[node] > 0:
+            tree.expand(node, board.get_valid_moves(last_move))
+            node = tree.reveal_child(node)
+            last_move = tree.get_move(node)
+            tokens.append(board.make_move(last_move))
+            path.append(node)
+
+        if board.board_completed:
+            tree.solve(path, board.winner)
+
+        if self.playouts_per_expansion > 1:
+            winners = BoardBatch.repeat(board, self.playouts_per_expansion).play_random(self._rng)
         else:
-            self.is_leaf = False
-            # generate children of this node
-            valid_moves = self.board.get_valid_moves(self.last_move)
-            for move in valid_moves:
-                cloned_board = self.board.clone()
-                cloned_board.make_move(move)
-                child_node = _Node(cloned_board, move, parent=self)
-                self.children.append(child_node)
+            # playout on a scratch copy.  A copy-on-write clone would mark the local boards of the search board as shared,
+            # so that the make/unmake calls of the following iterations would have to copy them
+            playout_board = board.clone()
+            while not playout_board.board_completed:
+                last_move = playout_board.get_random_valid_move(last_move)
+                playout_board.make_move(last_move)
+            winners = (playout_board.winner,)
+        tree.backpropogate(path, winners)
 
-            # select one for playout
-            return random.choice(self.children)
+        for token in reversed(tokens):
+            board.unmake_move(token)
 
-    def do_playout(self):
+    def _may_widen(self, tree, node):
         """
-        Plays out a game from this node by randomly selecting moves until the board is completed
+        Private function which checks whether progressive widening allows another child for an expanded node
+        """
+        if self.widening_exponent is None:
+            return True
+        return tree.child_count[node] < self.widening_constant * tree.visits[node] ** self.widening_exponent
+
+    def _reuse_tree(self, moves):
+        """
+        Private function which finds the node of the current position in the tree of the previous search by following
+        the moves played since then.  The subtree below the node is copied to a new tree, which releases the rest of
+        the old tree
+        :param moves: the moves played to reach the current position
+        :return: the new _Tree, or None if the position was not reached by the previous search
+        """
+        tree = self._tree
+        self._tree = None
+        ply = len(self._tree_moves)
+        if tree is None or ply > len(moves) or moves[0:ply] != self._tree_moves:
+            return None
+        node = 0
+        for move in moves[ply:]:
+            node = tree.find_child(node, move)
+            if node is None:
+                return None
+        if node == 0:
+            return tree
+        return tree.extract(node)
+
+
+_MOVES = Move.get_all(Board.X) + Move.get_all(Board.O)  # _MOVES[hash(move)] is move
+_UNPROVEN = 2  # _Tree.proven of a node whose result is not known
+
+
+# private class for the Monte Carlo game tree
+class _Tree(object):
+    """
+    Struct-of-arrays storage for a Monte Carlo search tree.  Node 0 is the root, and node i is described by entry i of
+    each array:
+        visits: number of playouts recorded through the node
+        wins: number of those playouts won by the player to move at the node
+        ties: number of those playouts that ended without a winner
+        parent: the parent node, or -1 for the root
+        first_child: the first child node, or -1 if the node has not been expanded.  Expanding a node reserves one
+            node number for each of its moves, from first_child to first_child + move_count - 1
+        move_count: the number of moves of the node (0 until it is expanded)
+        child_count: the number of those moves which have a child node.  They come first, so the children of a node
+            are numbered first_child to first_child + child_count - 1.  The remaining entries only hold their move
+        move: hash() of the move leading to the node (see _MOVES), or -1 for the root
+        player: the player to move at the node
+        proven: the game theoretic result of the node for the player to move, if it is known (see solve): 1 for a
+            win, 0 for a draw and -1 for a loss.  _UNPROVEN otherwise
+    The arrays are preallocated and grow by doubling when they fill up
+    """
+    def __init__(self, player, capacity=4096):
+        """
+        Creates a tree with a single (root) node
+        :param player: the player to move at the root
+        :param capacity: the number of nodes to allocate space for
+        """
+        self.size = 1
+        self.visits = numpy.zeros(capacity, dtype=numpy.int64)
+        self.wins = numpy.zeros(capacity, dtype=numpy.int64)
+        self.ties = numpy.zeros(capacity, dtype=numpy.int64)
+        self.parent = numpy.full(capacity, -1, dtype=numpy.int32)
+        self.first_child = numpy.full(capacity, -1, dtype=numpy.int32)
+        self.move_count = numpy.zeros(capacity, dtype=numpy.int16)
+        self.child_count = numpy.zeros(capacity, dtype=numpy.int16)
+        self.move = numpy.full(capacity, -1, dtype=numpy.int16)
+        self.player = numpy.zeros(capacity, dtype=numpy.int8)
+        self.proven = numpy.full(capacity, _UNPROVEN, dtype=numpy.int8)
+        self.player[0] = player
+
+    def _grow(self, needed):
+        capacity = len(self.visits)
+        while capacity < needed:
+            capacity *= 2
+        for name, fill in (('visits', 0), ('wins', 0), ('ties', 0), ('parent', -1), ('first_child', -1),
+                           ('move_count', 0), ('child_count', 0), ('move', -1), ('player', 0),
+                           ('proven', _UNPROVEN)):
+            old = getattr(self, name)
+            new = numpy.full(capacity, fill, dtype=old.dtype)
+            new[0:self.size] = old[0:self.size]
+            setattr(self, name, new)
+
+    def children(self, node):
+        """
+        :return: range of the child node numbers of the node
+        """
+        first_child = int(self.first_child[node])
+        if first_child < 0:
+            return range(0, 0)
+        return range(first_child, first_child + int(self.child_count[node]))
+
+    def get_move(self, node):
+        """
+        :return: the Move leading to the node
+        """
+        return _MOVES[self.move[node]]
+
+    def root_statistics(self):
+        """
+        :return: list of (move, visits, wins, ties, proven) tuples, one per move of the root (with zero counts for moves
+            without a child node).  proven is the proven result of the child for the player to move there, or None
+        """
+        first_child = int(self.first_child[0])
+        return [(self.get_move(child), int(self.visits[child]), int(self.wins[child]), int(self.ties[child]),
+                 None if self.proven[child] == _UNPROVEN else int(self.proven[child]))
+                for child in range(first_child, first_child + int(self.move_count[0]))]
+
+    def find_child(self, node, move):
+        """
+        :return: the child of the node reached by the move, or None if the node has no such child
+        """
+        for child in self.children(node):
+            if self.move[child] == hash(move):
+                return child
+        return None
+
+    def expand(self, node, moves):
+        """
+        Records the moves of a node.  Their child nodes are created by reveal_child
+        :param node: the node to expand
+        :param moves: the valid moves of the node's position
         :return: None
         """
-        board = self.board.clone()
-        last_move = self.last_move
-        while not board.board_completed:
-            valid_moves = board.get_valid_moves(last_move)
-            selected_move = random.choice(valid_moves)
-            board.make_move(selected_move)
-            last_move = selected_move
+        first_child = self.size
+        if first_child + len(moves) > len(self.visits):
+            self._grow(first_child + len(moves))
+        self.size += len(moves)
+        children = slice(first_child, self.size)
+        self.parent[children] = node
+        self.move[children] = [hash(move) for move in moves]
+        self.player[children] = Board.O if moves[0].player == Board.X else Board.X
+        self.first_child[node] = first_child
+        self.move_count[node] = len(moves)
 
-        winner = board.winner
-        self.backpropogate(winner)
+    def reveal_child(self, node):
+        """
+        Creates the child node of a random move of the node which does not have one yet
+        :param node: an expanded node with child_count < move_count
+        :return: the node number of the new child
+        """
+        child = int(self.first_child[node]) + int(self.child_count[node])
+        picked = child + random.randrange(0, int(self.move_count[node]) - int(self.child_count[node]))
+        self.move[child], self.move[picked] = self.move[picked], self.move[child]
+        self.child_count[node] += 1
+        return child
+
+    def select_child(self, node, exploration_param=1.41421356):
+        """
+        Selection phase of the MCTS algorithm: picks the child of the node with the highest UCT1 value
+        UCT1 = w / n  + c * sqrt( ln(N) / n)
+        where w = number of wins recorded for the child, n = number of playouts recorded for the child,
+        c = tunable exploration parameter ( default sqrt(2) ), and N = total playouts recorded at the root.
+        Children without playouts have an infinite value, so they are tried first, in order.  Proven children are
+        never selected
+        :param node: an expanded node
+        :param exploration_param: the parameter c determining the strength of the exploration component of UCT1
+        :return: the node number of the selected child, or None if every child of the node is proven
+        """
+        first_child = int(self.first_child[node])
+        children = slice(first_child, first_child + int(self.child_count[node]))
+        visits = self.visits[children]
+        open_children = self.proven[children] == _UNPROVEN
+        unvisited = numpy.flatnonzero(open_children & (visits == 0))
+        if len(unvisited) > 0:
+            return first_child + int(unvisited[0])
+        if not open_children.any():
+            return None
+        uct = self.wins[children] / visits + exploration_param * numpy.sqrt(numpy.log(self.visits[0]) / visits)
+        return first_child + int(numpy.argmax(numpy.where(open_children, uct, -numpy.inf)))
+
+    def solve(self, path, winner):
+        """
+        Marks the last node of a path, whose game is over, as proven, and passes the proof up the path as far as it
+        goes.  A node is a proven win if one of its children is a proven loss, and otherwise it is proven once all of
+        its moves have proven children, with the best of their results
+        :param path: list of node numbers from the root to the finished node
+        :param winner: the winner of the finished game (Board.EMPTY or Board.CAT for a tie)
+        :return: None
+        """
+        node = path[-1]
+        # the player to move after the end of a game never won it
+        self.proven[node] = -1 if winner in (Board.X, Board.O) else 0
+        for parent in reversed(path[:-1]):
+            if self.proven[node] == -1:
+                self.proven[parent] = 1
+            else:
+                if self.child_count[parent] < self.move_count[parent]:
+                    return
+                first_child = int(self.first_child[parent])
+                results = self.proven[first_child:first_child + int(self.move_count[parent])]
+                if (results == _UNPROVEN).any():
+                    return
+                self.proven[parent] = -int(results.min())
+            node = parent
 
-    def backpropogate(self, winner):
+    def backpropogate(self, path, winners):
         """
-        Propogates the result of a playout upwards to the root node
+        Records the results of playouts at every node of the path they were played through
+        :param path: list of node numbers from the root to the node the playouts started from
+        :param winners: sequence of the winners of the playouts (Board.EMPTY or Board.CAT for a tie)
         :return: None
         """
-        parent = self
-        while parent is not None:
-            parent.games_recorded += 1
-            if parent.player == winner:
-                parent.wins_recorded += 1
-            elif winner == Board.EMPTY or winner == Board.CAT:
-                parent.ties_recorded += 1
-            parent = parent.parent
+        winners = numpy.asarray(winners)
+        x_wins = int(numpy.count_nonzero(winners == Board.X))
+        o_wins = int(numpy.count_nonzero(winners == Board.O))
+        path = numpy.array(path)
+        self.visits[path] += len(winners)
+        self.ties[path] += len(winners) - x_wins - o_wins
+        self.wins[path] += numpy.where(self.player[path] == Board.X, x_wins, o_wins)
+
+    def extract(self, node):
+        """
+        Copies the subtree below a node to a new tree, with the node as its root
+        :param node: the node number of the new root
+        :return: the new _Tree
+        """
+        # collect the subtree level by level, so that the children of each node stay consecutive
+        levels = []
+        level = numpy.array([node])
+        while len(level) > 0:
+            levels.append(level)
+            expanded = level[self.first_child[level] >= 0]
+            starts = self.first_child[expanded].astype(numpy.int64)
+            counts = self.move_count[expanded].astype(numpy.int64)
+            offsets = numpy.repeat(numpy.cumsum(counts) - counts, counts)
+            level = numpy.repeat(starts, counts) + numpy.arange(int(counts.sum())) - offsets
+        old_nodes = numpy.concatenate(levels)
+
+        new_number = numpy.full(self.size, -1, dtype=numpy.int32)
+        new_number[old_nodes] = numpy.arange(len(old_nodes))
+        tree = _Tree(self.player[node], capacity=max(4096, 2 * len(old_nodes)))
+        tree.size = len(old_nodes)
+        nodes = slice(0, tree.size)
+        for name in ('visits', 'wins', 'ties', 'move_count', 'child_count', 'move', 'player', 'proven'):
+            getattr(tree, name)[nodes] = getattr(self, name)[old_nodes]
+        first_child = self.first_child[old_nodes]
+        tree.first_child[nodes] = numpy.where(first_child >= 0, new_number[first_child], -1)
+        tree.parent[nodes] = new_number[self.parent[old_nodes]]
+        tree.parent[0] = -1
+        tree.move[0] = -1
+        return tree
@@ -0,0 +1,152 @@
+from models.game.Board import Board
+from models.game import BitboardUtils as Bits
+from models.game import OutcomeTable
+
+
+def _build_local_balance_table():
+    # table[index] is the number of open two-in-a-rows X holds on a local board minus the number O holds
+    table = []
+    for index in range(0, OutcomeTable.NUM_CONFIGURATIONS):
+        x_mask, o_mask = OutcomeTable.index_to_masks(index)
+        balance = 0
+        if OutcomeTable.OUTCOMES[index] == Board.EMPTY:
+            for line in Bits.WIN_LINES:
+                if Bits.POPCOUNT[x_mask & line] == 2 and not o_mask & line:
+                    balance += 1
+                elif Bits.POPCOUNT[o_mask & line] == 2 and not x_mask & line:
+                    balance -= 1
+        table.append(balance)
+    return tuple(table)
+
+
+_LOCAL_BALANCE = _build_local_balance_table()
+# the value of capturing a local board is the number of meta-lines it is part of
+_META_WEIGHTS = tuple(len(lines) for lines in Bits.LINES_THROUGH_CELL)
+
+
+class MoveOrdering(object):
+    """ Orders the moves of a node of a MinimaxBot search so that the best moves are likely to be searched first
+
+    Alpha-beta search prunes the most when the best move is searched first.  The moves of a node are ordered by:
+        1. the best move stored for the node in the transposition table
+        2. tactical moves: moves that win the game, then moves that capture a local board, then moves that block the
+           opponent from capturing a local board
+        3. killer moves: moves which caused a cutoff at the same ply (number of moves played) elsewhere in the search
+        4. the history heuristic: moves which caused cutoffs often (weighted by depth) anywhere in the search
+    Optionally, the remaining (quiet) moves are ordered by a cheap static score of the position after the move before
+    the history heuristic is applied.  This costs a make/unmake and a static evaluation per move, but it is much
+    cheaper than the compute_score method of the Weka bots.
+
+    Each part can be switched off, and subclasses can override order() to plug in a different scheme
+    """
+    def __init__(self, tactical=True, killers=True, history=True, static_score=None):
+        """
+        :param tactical: order winning and blocking moves first
+        :param killers: order killer moves before the other quiet moves
+        :param history: order quiet moves by the history heuristic
+        :param static_score: optional function scoring a GlobalBoard from the perspective of 'X' (e.g.
+            MoveOrdering.cheap_score).  If set, quiet moves of nodes at least 2 plies from the horizon are ordered by it
+        """
+        self.tactical = tactical
+        self.use_killers = killers
+        self.use_history = history
+        self.static_score = static_score
+        self.killers = [[None, None] for i in range(0, 82)]  # two killer moves per ply
+        self.history = [0] * 162  # indexed by hash(move)
+
+    def new_search(self):
+        """
+        Called at the start of each search.  History scores are halved so that recent cutoffs weigh the most
+        :return: None
+        """
+        self.history = [score // 2 for score in self.history]
+
+    def record_cutoff(self, board, move, depth):
+        """
+        Records a move which caused a beta cutoff
+        :param board: the GlobalBoard the move was made on (before the move)
+        :param move: the move that caused the cutoff
+        :param depth: the remaining search depth of the node
+        :return: None
+        """
+        killers = self.killers[board.total_moves]
+        if killers[0] is not move:
+            killers[1] = killers[0]
+            killers[0] = move
+        self.history[hash(move)] += depth * depth
+
+    def order(self, board, moves, table_move=None, depth=0):
+        """
+        Orders the moves of a node
+        :param board: the GlobalBoard of the node
+        :param moves: the valid moves of the node
+        :param table_move: the best move stored in the transposition table for the node, or None
+        :param depth: the remaining search depth of the node
+        :return: list of the moves, best first
+        """
+        if len(moves) < 2:
+            return moves
+
+        player = moves[0].player
+        meta_mask = board.x_mask if player == Board.X else board.o_mask
+        killers = self.killers[board.total_moves] if self.use_killers else (None, None)
+        history = self.history
+        use_history = self.use_history
+        static_score = self.static_score if depth >= 2 else None
+        sign = 1 if player == Board.X else -1
+
+        keys = []
+        for i, move in enumerate(moves):
+            priority = 0
+            if move is table_move:
+                priority = 6
+            elif self.tactical:
+                local_board = board.board[move.metarow][move.metacol]
+                if player == Board.X:
+                    own_mask, other_mask = local_board.x_mask, local_board.o_mask
+                else:
+                    own_mask, other_mask = local_board.o_mask, local_board.x_mask
+                bit = 1 << move.local_index
+                if Bits.WINNING_CELLS[own_mask] & bit:
+                    priority = 5 if Bits.WINNING_CELLS[meta_mask] & (1 << move.meta_index) else 4
+                elif Bits.WINNING_CELLS[other_mask] & bit:
+                    priority = 3
+            if priority == 0:
+                if move is killers[0]:
+                    priority = 2
+                elif move is killers[1]:
+                    priority = 1
+
+            static = 0
+            if priority == 0 and static_score is not None:
+                token = board.make_move(move)
+                static = sign * static_score(board)
+                board.unmake_move(token)
+            keys.append((priority, static, history[hash(move)] if use_history else 0, -i))
+
+        order = sorted(range(0, len(moves)), key=keys.__getitem__, reverse=True)
+        return [moves[i] for i in order]
+
+    @staticmethod
+    def cheap_score(board):
+        """
+        A fast static evaluation for ordering moves: captured local boards weighted by the number of meta-lines through
+        them, plus a small bonus for open two-in-a-rows on the local boards that are still open
+        :param board: the GlobalBoard to score
+        :return: a float in the range [-1, 1] from the perspective of 'X'
+        """
+        if board.board_completed:
+            if board.winner == Board.X:
+                return 1
+            elif board.winner == Board.O:
+                return -1
+            return 0
+
+        score = 0
+        for meta in Bits.MASK_BITS[board.x_mask]:
+            score += _META_WEIGHTS[meta]
+        for meta in Bits.MASK_BITS[board.o_mask]:
+            score -= _META_WEIGHTS[meta]
+        for meta in Bits.MASK_BITS[board.open_mask]:
+            score += 0.25 * _LOCAL_BALANCE[board.board[meta // 3][meta % 3].index]
+        return max(-0.99, min(0.99, score / 24.0))
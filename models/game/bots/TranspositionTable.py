@@ -0,0 +1,94 @@
+from collections import namedtuple
+
+# key is the full 64-bit position hash, used to detect collisions between positions which share a slot
+TableEntry = namedtuple('TableEntry', ['key', 'depth', 'bound', 'value', 'move', 'generation'])
+
+
+class TranspositionTable(object):
+    """ Fixed-size hash table of search results, keyed by GlobalBoard.hash
+
+    In Ultimate Tic-Tac-Toe, moves in different local boards commute, so a search reaches the same position through
+    many move orders.  The table remembers the result of searching each position so that it is not searched again.
+
+    Each entry stores the depth the position was searched to, the value found, whether that value is exact or only a
+    lower/upper bound (because of an alpha-beta cutoff), and the best move, which is worth searching first when the
+    position is searched again to a greater depth.
+
+    The table has a fixed number of slots (a power of two) and never grows.  When two positions map to the same slot,
+    the replacement policy decides which one is kept:
+        ALWAYS_REPLACE: the newest entry always wins
+        DEPTH_PREFERRED: the new entry only replaces an entry of the current search if it was searched at least as deep
+    Entries from previous searches (see new_search) can always be replaced.
+    """
+    EXACT = 0
+    LOWER_BOUND = 1  # the true value is at least 'value' (the search failed high)
+    UPPER_BOUND = 2  # the true value is at most 'value' (the search failed low)
+
+    ALWAYS_REPLACE = 'always'
+    DEPTH_PREFERRED = 'depth'
+
+    ENTRY_BYTES = 200  # approximate memory used by one entry (the slot, the entry tuple, and the integers in it)
+
+    def __init__(self, max_megabytes=64, replacement_policy=DEPTH_PREFERRED):
+        """
+        :param max_megabytes: memory cap for the table.  The number of slots is the largest power of two that fits
+        :param replacement_policy: ALWAYS_REPLACE or DEPTH_PREFERRED
+        """
+        if replacement_policy not in (TranspositionTable.ALWAYS_REPLACE, TranspositionTable.DEPTH_PREFERRED):
+            raise Exception("Unknown transposition table replacement policy: %s" % replacement_policy)
+
+        max_entries = int(max_megabytes * 1024 * 1024) // TranspositionTable.ENTRY_BYTES
+        if max_entries < 1:
+            raise Exception("A transposition table needs at least %s bytes" % TranspositionTable.ENTRY_BYTES)
+        self.size = 1
+        while self.size * 2 <= max_entries:
+            self.size *= 2
+        self.replacement_policy = replacement_policy
+        self.generation = 0
+        self.probes = 0
+        self.hits = 0
+        self._mask = self.size - 1
+        self._slots = [None] * self.size
+
+    def new_search(self):
+        """
+        Marks the start of a new search.  Entries from earlier searches remain usable but can always be replaced
+        :return: None
+        """
+        self.generation += 1
+
+    def probe(self, key):
+        """
+        Looks up a position
+        :param key: the hash of the position
+        :return: the TableEntry stored for the position, or None
+        """
+        self.probes += 1
+        entry = self._slots[key & self._mask]
+        if entry is not None and entry.key == key:
+            self.hits += 1
+            return entry
+        return None
+
+    def store(self, key, depth, bound, value, move):
+        """
+        Records the result of searching a position, subject to the replacement policy
+        :param key: the hash of the position
+        :param depth: the depth the position was searched to
+        :param bound: EXACT, LOWER_BOUND or UPPER_BOUND
+        :param value: the value of the position from the searching bot's perspective
+        :param move: the best move found, or None
+        :return: None
+        """
+        slot = key & self._mask
+        entry = self._slots[slot]
+        if entry is not None and self.replacement_policy == TranspositionTable.DEPTH_PREFERRED \
+                and entry.generation == self.generation and entry.depth > depth and entry.key != key:
+            return
+        self._slots[slot] = TableEntry(key, depth, bound, value, move, self.generation)
+
+    def clear(self):
+        """ Removes every entry from the table """
+        self._slots = [None] * self.size
+        self.probes = 0
+        self.hits = 0
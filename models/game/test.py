@@ -1,6 +1,18 @@
 import unittest
+import random
+import time
+import pickle
 
-from . import Move, Board, LocalBoard, GlobalBoard, Player, Game
+import numpy
+from . import Move, Board, LocalBoard, GlobalBoard, BoardBatch, Player, Game
+from . import OutcomeTable, Zobrist, Symmetry, Perft
+from .bots.MinimaxBot import MinimaxBot
+from .bots.TranspositionTable import TranspositionTable
+from .bots.MoveOrdering import MoveOrdering
+from .bots.MonteCarloBot import MonteCarloBot
+from models.data.BoardDataModel import BoardDataModel
+from models.data.GameDataModel import GameDataModel
+from services import SearchPoolService
 
 
 class MoveUnitTest(unittest.TestCase):
@@ -42,6 +54,19 @@ class MoveUnitTest(unittest.TestCase):
         with self.assertRaises(Exception):
             bad_move = Move(Board.O, 0, 0, 0, -3)
 
+    def test_interned_moves(self):
+        self.assertIs(Move(Board.X, 2, 1, 2, 1), self.move3)
+        self.assertIs(Move.get(Board.X, 8 * 9 + 4), self.move3)
+        self.assertIsNot(Move(Board.O, 2, 1, 2, 1), self.move3)
+        self.assertEqual(len(Move.get_all(Board.O)), 81)
+
+        history = {self.move1: 1, self.move2: 2}
+        self.assertEqual(history[Move(Board.X, 1, 0, 0, 0)], 2)
+        self.assertNotIn(Move(Board.O, 1, 0, 0, 0), history)
+
+        with self.assertRaises(Exception):
+            self.move1.row = 2
+
 
 class LocalBoardUnitTest(unittest.TestCase):
     def test_moves(self):
@@ -97,6 +122,30 @@ class LocalBoardUnitTest(unittest.TestCase):
         self.assertEqual(board.winner, Board.EMPTY)
 
 
+class OutcomeTableUnitTest(unittest.TestCase):
+    def test_outcomes(self):
+        self.assertEqual(len(OutcomeTable.OUTCOMES), 3 ** 9)
+        self.assertEqual(OutcomeTable.OUTCOMES[0], Board.EMPTY)
+
+        x_diagonal = OutcomeTable.masks_to_index(0b100010001, 0b000001010)
+        self.assertEqual(OutcomeTable.OUTCOMES[x_diagonal], Board.X)
+        o_column = OutcomeTable.masks_to_index(0b000010001, 0b100100100)
+        self.assertEqual(OutcomeTable.OUTCOMES[o_column], Board.O)
+        full_tie = OutcomeTable.masks_to_index(0b110001101, 0b001110010)
+        self.assertEqual(OutcomeTable.OUTCOMES[full_tie], Board.CAT)
+
+    def test_index_round_trip(self):
+        for index in [0, 1, 2, 100, 9999, 3 ** 9 - 1]:
+            x_mask, o_mask = OutcomeTable.index_to_masks(index)
+            self.assertEqual(OutcomeTable.masks_to_index(x_mask, o_mask), index)
+
+    def test_incremental_index(self):
+        board = LocalBoard()
+        board.make_move(Move(Board.X, 0, 0, 1, 1))
+        board.make_move(Move(Board.O, 0, 0, 2, 0))
+        self.assertEqual(board.index, OutcomeTable.masks_to_index(board.x_mask, board.o_mask))
+
+
 class GlobalBoardUnitTest(unittest.TestCase):
     def test_moves(self):
         board = GlobalBoard()
@@ -140,6 +189,547 @@ class GlobalBoardUnitTest(unittest.TestCase):
         valid_moves = board.get_valid_moves(move1)  # test sending opponent to a board that has been won
         self.assertEqual(len(valid_moves), 72)
 
+    def test_copy_on_write_clone(self):
+        board = GlobalBoard()
+        board.make_move(Move(Board.X, 0, 0, 1, 1))
+        child = board.clone(copy_on_write=True)
+        child.make_move(Move(Board.O, 1, 1, 0, 0))
+        self.assertIs(child.board[0][0], board.board[0][0])
+        self.assertIsNot(child.board[1][1], board.board[1][1])
+        self.assertEqual(board.check_small_cell(1, 1, 0, 0), Board.EMPTY)
+        self.assertEqual(child.check_small_cell(1, 1, 0, 0), Board.O)
+
+        # the parent must not write through to the child either
+        token = board.make_move(Move(Board.O, 0, 0, 0, 0))
+        self.assertEqual(child.check_small_cell(0, 0, 0, 0), Board.EMPTY)
+        board.unmake_move(token)
+        self.assertEqual(board.check_small_cell(0, 0, 0, 0), Board.EMPTY)
+        self.assertEqual(child.check_small_cell(0, 0, 1, 1), Board.X)
+
+    def test_count_and_sample_valid_moves(self):
+        rng = random.Random(7)
+        board = GlobalBoard()
+        last_move = None
+        while not board.board_completed:
+            valid_moves = board.get_valid_moves(last_move)
+            self.assertEqual(board.count_valid_moves(last_move), len(valid_moves))
+            for i in range(0, 5):
+                self.assertIn(board.get_random_valid_move(last_move, rng), valid_moves)
+            last_move = rng.choice(valid_moves)
+            board.make_move(last_move)
+
+    def test_byte_encoding(self):
+        board = GlobalBoard()
+        for move in [Move(Board.X, 1, 1, 0, 0), Move(Board.O, 0, 0, 1, 1), Move(Board.X, 1, 1, 1, 1),
+                     Move(Board.O, 1, 1, 0, 2), Move(Board.X, 0, 2, 1, 1), Move(Board.O, 1, 1, 2, 2)]:
+            board.make_move(move)
+        encoded = board.to_bytes()
+        self.assertEqual(len(encoded), GlobalBoard.ENCODED_SIZE)
+
+        decoded = GlobalBoard.from_bytes(encoded)
+        self.assertEqual(str(decoded), str(board))
+        self.assertEqual(decoded.hash, board.hash)
+        self.assertEqual(decoded.forced_board, 8)
+        self.assertEqual(decoded.next_player, Board.X)
+        self.assertEqual(decoded.to_bytes(), encoded)
+
+        batch = BoardBatch.from_boards([board, GlobalBoard()])
+        encoded_batch = batch.to_array()
+        self.assertEqual(bytes(encoded_batch[0]), encoded)
+        self.assertEqual(bytes(encoded_batch[1]), GlobalBoard().to_bytes())
+        self.assertTrue((BoardBatch.from_array(encoded_batch).cells == batch.cells).all())
+
+    def test_meta_masks(self):
+        board = GlobalBoard()
+        for move in [Move(Board.O, 0, 2, 0, 2), Move(Board.O, 0, 2, 1, 1), Move(Board.O, 0, 2, 2, 0)]:
+            board.make_move(move)
+        self.assertEqual(board.o_mask, 1 << 2)
+        self.assertEqual(board.check_cell(0, 2), Board.O)
+        self.assertEqual(board.check_small_cell(0, 2, 1, 1), Board.O)
+        self.assertEqual(board.check_small_cell(0, 2, 0, 0), Board.EMPTY)
+
+        cloned_board = board.clone()
+        cloned_board.make_move(Move(Board.X, 1, 1, 1, 1))
+        self.assertEqual(cloned_board.o_mask, 1 << 2)
+        self.assertEqual(board.check_small_cell(1, 1, 1, 1), Board.EMPTY)
+        self.assertEqual(board.counts(), (0, 3))
+
+    def test_dead_draw(self):
+        x_won = LocalBoard.from_masks(0b000000111, 0b000011000)
+        o_won = LocalBoard.from_masks(0b000011000, 0b000000111)
+        # meta-board X O X / X O O / O _ _: X is shut out, and O needs the bottom-middle board
+        grid = [[x_won, o_won, x_won.clone()],
+                [x_won.clone(), o_won.clone(), o_won.clone()],
+                [o_won.clone(), LocalBoard.from_masks(0b000110001, 0), LocalBoard()]]
+        board = GlobalBoard(board=grid, next_player=Board.X, forced_board=7)
+        self.assertFalse(board.board_completed)
+        self.assertEqual(board.o_winnable_mask, 0b111110010)
+
+        # X blocks the last line O had on the bottom-middle board, so neither player can complete a meta-line
+        token = board.make_move(Move(Board.X, 2, 1, 2, 1))
+        self.assertTrue(board.board_completed)
+        self.assertEqual(board.winner, Board.EMPTY)
+        self.assertTrue(BoardBatch.from_boards([board]).check_completed()[0])
+
+        board.unmake_move(token)
+        self.assertFalse(board.board_completed)
+        self.assertEqual(board.o_winnable_mask, 0b111110010)
+
+    def test_unmake_move(self):
+        board = GlobalBoard()
+        moves = [
+            Move(Board.X, 1, 1, 0, 0),
+            Move(Board.O, 0, 0, 1, 1),
+            Move(Board.X, 1, 1, 1, 1),
+            Move(Board.O, 1, 1, 0, 2),
+            Move(Board.X, 1, 1, 2, 2),
+        ]
+        snapshots = []
+        tokens = []
+        for move in moves:
+            snapshots.append((str(board), board.x_mask, board.o_mask, board.index, board.total_moves))
+            tokens.append(board.make_move(move))
+        self.assertEqual(board.check_cell(1, 1), Board.X)
+
+        for move, token in reversed(list(zip(moves, tokens))):
+            board.unmake_move(token)
+            self.assertEqual((str(board), board.x_mask, board.o_mask, board.index, board.total_moves), snapshots.pop())
+        self.assertEqual(board.check_cell(1, 1), Board.EMPTY)
+        self.assertFalse(board.board[1][1].board_completed)
+        self.assertFalse(board.board_completed)
+
+
+class ZobristUnitTest(unittest.TestCase):
+    def test_incremental_hash(self):
+        board = GlobalBoard()
+        self.assertEqual(board.hash, Zobrist.compute_hash(board))
+        hashes = [board.hash]
+        tokens = []
+        moves = [Move(Board.X, 1, 1, 0, 0), Move(Board.O, 0, 0, 1, 1), Move(Board.X, 1, 1, 1, 1),
+                 Move(Board.O, 1, 1, 0, 2), Move(Board.X, 0, 2, 1, 1), Move(Board.O, 1, 1, 2, 2)]
+        for move in moves:
+            tokens.append(board.make_move(move))
+            self.assertEqual(board.hash, Zobrist.compute_hash(board))
+            self.assertNotIn(board.hash, hashes)
+            hashes.append(board.hash)
+        self.assertEqual(board.clone().hash, board.hash)
+
+        for token in reversed(tokens):
+            board.unmake_move(token)
+            hashes.pop()
+            self.assertEqual(board.hash, hashes[-1])
+
+    def test_transpositions(self):
+        # moves in different local boards commute, so both orders reach the same position
+        board1 = GlobalBoard()
+        board2 = GlobalBoard()
+        for move in [Move(Board.X, 0, 0, 1, 1), Move(Board.O, 1, 1, 0, 2), Move(Board.X, 0, 2, 0, 0),
+                     Move(Board.O, 0, 0, 1, 0)]:
+            board1.make_move(move)
+        for move in [Move(Board.X, 0, 2, 0, 0), Move(Board.O, 1, 1, 0, 2), Move(Board.X, 0, 0, 1, 1),
+                     Move(Board.O, 0, 0, 1, 0)]:
+            board2.make_move(move)
+        self.assertEqual(board1.hash, board2.hash)
+        self.assertEqual(board1.forced_board, 3)
+        self.assertEqual(board1.next_player, Board.X)
+
+
+class BoardBatchUnitTest(unittest.TestCase):
+    def test_matches_global_board(self):
+        rng = random.Random(11)
+        boards = [GlobalBoard() for i in range(0, 4)]
+        last_moves = [None] * 4
+        batch = BoardBatch(4)
+        while not all(board.board_completed for board in boards):
+            legal = batch.legal_mask()
+            moves = numpy.full(4, -1)
+            for i, board in enumerate(boards):
+                if board.board_completed:
+                    continue
+                valid_moves = board.get_valid_moves(last_moves[i])
+                self.assertEqual(sorted(move.abs_index for move in valid_moves), list(numpy.nonzero(legal[i])[0]))
+                last_moves[i] = rng.choice(valid_moves)
+                board.make_move(last_moves[i])
+                moves[i] = last_moves[i].abs_index
+            batch.apply(moves)
+            for i, board in enumerate(boards):
+                self.assertEqual(batch.completed[i], board.board_completed)
+                self.assertEqual(batch.winner[i], board.winner)
+
+        for i, board in enumerate(boards):
+            self.assertEqual(batch.to_board(i).hash, board.hash)
+            self.assertEqual(str(batch.to_board(i)), str(board))
+
+    def test_play_random(self):
+        board = GlobalBoard()
+        board.make_move(Move(Board.X, 1, 1, 1, 1))
+        batch = BoardBatch.repeat(board, 16)
+        winners = batch.play_random(numpy.random.RandomState(3))
+        self.assertTrue(batch.completed.all())
+        self.assertFalse(batch.legal_mask().any())
+        for winner in winners:
+            self.assertIn(winner, [Board.X, Board.O, Board.EMPTY])
+
+
+class SymmetryUnitTest(unittest.TestCase):
+    def test_permutations(self):
+        self.assertEqual(len(Symmetry.PERMUTATIONS), 8)
+        self.assertEqual(len(set(Symmetry.PERMUTATIONS)), 8)
+        for permutation in Symmetry.PERMUTATIONS:
+            self.assertEqual(sorted(permutation), list(range(0, 81)))
+            # local boards must map onto whole local boards
+            for meta in range(0, 9):
+                cells = [Move.get(Board.X, abs_index) for abs_index in range(0, 81)
+                         if Move.get(Board.X, permutation[abs_index]).meta_index == meta]
+                self.assertEqual(len(set(move.meta_index for move in cells)), 1)
+
+    def test_canonicalize(self):
+        cells = [0] * 81
+        cells[0] = Board.X  # top-left corner
+        cells[13] = Board.O
+        rotated = Symmetry.transform(cells, 1)
+        self.assertEqual(rotated[8], Board.X)  # the corner moves to the top-right
+        self.assertEqual(Symmetry.canonicalize(cells)[0], Symmetry.canonicalize(rotated)[0])
+        for symmetry in range(0, 8):
+            canonical, used = Symmetry.canonicalize(Symmetry.transform(cells, symmetry))
+            self.assertEqual(canonical, Symmetry.canonicalize(cells)[0])
+
+        other = [0] * 81
+        other[40] = Board.X
+        self.assertNotEqual(Symmetry.canonicalize(other)[0], Symmetry.canonicalize(cells)[0])
+
+
+class PerftUnitTest(unittest.TestCase):
+    def test_reference_counts(self):
+        # the full reference depths are run by 'python -m models.game.Perft'
+        Perft.check(Perft.run(max_depth=3, verbose=False))
+
+    def test_differential(self):
+        for name, moves, expected_counts in Perft.REFERENCE_POSITIONS:
+            board, last_move = Perft.setup_position(moves)
+            encoded = board.to_bytes()
+            self.assertEqual(Perft.differential(board, 2, last_move), expected_counts[1])
+            self.assertEqual(board.to_bytes(), encoded)
+
+        # a reference that disagrees on the rules is reported
+        board, last_move = Perft.setup_position(Perft.REFERENCE_POSITIONS[1][1])
+        reference = GlobalBoard()
+        self.assertRaises(Exception, Perft.differential, board, 2, last_move, reference, last_move)
+
+
+class _CountingMinimaxBot(MinimaxBot):
+    # deterministic scores, so that searches with and without the transposition table can be compared
+    def compute_score(self, board):
+        x_count, o_count = board.counts()
+        return ((board.x_mask * 7 + board.o_mask * 3 + x_count - o_count * 2) % 19 - 9) / 10.0
+
+
+class MinimaxBotUnitTest(unittest.TestCase):
+    def test_transposition_table(self):
+        rng = random.Random(5)
+        hits = 0
+        for game in range(0, 4):
+            board, last_move = Perft.setup_position([])
+            for i in range(0, 12 + game * 10):
+                last_move = board.get_random_valid_move(last_move, rng)
+                board.make_move(last_move)
+            player = Board.O if last_move.player == Board.X else Board.X
+            valid_moves = board.get_valid_moves(last_move)
+
+            plain_bot = _CountingMinimaxBot(player, table_megabytes=0)
+            table_bot = _CountingMinimaxBot(player)
+            plain_value, plain_move = plain_bot._max(board, valid_moves, -float('inf'), float('inf'), 4)
+            table_value, table_move = table_bot._max(board, valid_moves, -float('inf'), float('inf'), 4)
+            self.assertEqual(plain_value, table_value)
+            hits += table_bot.transposition_table.hits
+
+            # the root entry is exact, and a repeated search is answered by the table
+            entry = table_bot.transposition_table.probe(board.hash)
+            self.assertEqual((entry.depth, entry.bound, entry.move), (4, TranspositionTable.EXACT, table_move))
+            self.assertEqual(table_bot._max(board, valid_moves, -float('inf'), float('inf'), 4), (table_value, table_move))
+        self.assertGreater(hits, 0)
+
+    def test_iterative_deepening(self):
+        board, last_move = Perft.setup_position(Perft.REFERENCE_POSITIONS[1][1])
+        valid_moves = board.get_valid_moves(last_move)
+
+        # with a depth limit, the deepest iteration decides the move
+        bot = _CountingMinimaxBot(Board.X, time_limit=60, max_depth=3)
+        fixed_depth_move = bot._max(board.clone(), valid_moves, -float('inf'), float('inf'), 3)[1]
+        self.assertEqual(bot.compute_next_move(board, valid_moves), fixed_depth_move)
+        self.assertEqual(bot.completed_depth, 3)
+
+        # without one, the search stops at the deadline and plays the move of the last completed iteration
+        bot = _CountingMinimaxBot(Board.X, time_limit=0.05)
+        start_time = time.perf_counter()
+        move = bot.compute_next_move(board, valid_moves)
+        self.assertLess(time.perf_counter() - start_time, 1)
+        self.assertIn(move, valid_moves)
+        self.assertGreaterEqual(bot.completed_depth, 1)
+        self.assertEqual(board.to_bytes(), Perft.setup_position(Perft.REFERENCE_POSITIONS[1][1])[0].to_bytes())
+
+        # heuristic scores outside (-1, 1) are not mistaken for a decided game
+        class OutOfRangeBot(MinimaxBot):
+            def compute_score(self, board):
+                return -1.1
+        for player in (Board.X, Board.O):
+            bot = OutOfRangeBot(player, time_limit=60, max_depth=3)
+            bot.compute_next_move(board, valid_moves)
+            self.assertGreater(bot.completed_depth, 1)
+
+    def test_move_ordering(self):
+        grid = [[LocalBoard(), LocalBoard(), LocalBoard()],
+                [LocalBoard(), LocalBoard.from_masks(0b000000011, 0b000011000), LocalBoard()],
+                [LocalBoard(), LocalBoard(), LocalBoard()]]
+        board = GlobalBoard(board=grid, next_player=Board.X, forced_board=4)
+        moves = board.get_valid_moves(Move(Board.O, 0, 0, 1, 1))
+        ordering = MoveOrdering()
+        ordering.record_cutoff(board, Move(Board.X, 1, 1, 2, 0), 3)
+        ordered = ordering.order(board, moves, table_move=Move(Board.X, 1, 1, 2, 2))
+        # table move, then X's winning move, then the move blocking O, then the killer move
+        self.assertEqual(ordered[0:4], [Move(Board.X, 1, 1, 2, 2), Move(Board.X, 1, 1, 0, 2), Move(Board.X, 1, 1, 1, 2),
+                                        Move(Board.X, 1, 1, 2, 0)])
+        self.assertEqual(sorted(ordered, key=hash), sorted(moves, key=hash))
+
+        # the counters measure the size of the search
+        bot = _CountingMinimaxBot(Board.X, time_limit=60, max_depth=3,
+                                  move_ordering=MoveOrdering(static_score=MoveOrdering.cheap_score))
+        bot.compute_next_move(board, moves)
+        self.assertGreater(bot.nodes, bot.leaf_evaluations)
+        self.assertGreater(bot.cutoffs, 0)
+
+    def test_principal_variation_search(self):
+        rng = random.Random(7)
+        for game in range(0, 3):
+            board, last_move = Perft.setup_position([])
+            for i in range(0, 15 + game * 5):
+                last_move = board.get_random_valid_move(last_move, rng)
+                board.make_move(last_move)
+            player = Board.O if last_move.player == Board.X else Board.X
+            valid_moves = board.get_valid_moves(last_move)
+
+            # the null-window searches only prune, so both algorithms find the same value
+            alpha_beta_bot = _CountingMinimaxBot(player)
+            pvs_bot = _CountingMinimaxBot(player, search=MinimaxBot.PVS)
+            alpha_beta_value = alpha_beta_bot._max(board, valid_moves, -float('inf'), float('inf'), 4)[0]
+            self.assertAlmostEqual(pvs_bot._pvs(board, valid_moves, -float('inf'), float('inf'), 4)[0], alpha_beta_value)
+
+            # iterative deepening with aspiration windows
+            pvs_bot = _CountingMinimaxBot(player, time_limit=60, max_depth=4, search=MinimaxBot.PVS)
+            self.assertIn(pvs_bot.compute_next_move(board, valid_moves), valid_moves)
+            self.assertEqual(pvs_bot.completed_depth, 4)
+
+    def test_batched_leaves(self):
+        class BatchCountingBot(_CountingMinimaxBot):
+            def compute_scores(self, boards):
+                self.batches += 1
+                return _CountingMinimaxBot.compute_scores(self, boards)
+
+        rng = random.Random(11)
+        for game in range(0, 3):
+            board, last_move = Perft.setup_position([])
+            for i in range(0, 10 + game * 8):
+                last_move = board.get_random_valid_move(last_move, rng)
+                board.make_move(last_move)
+            player = Board.O if last_move.player == Board.X else Board.X
+            valid_moves = board.get_valid_moves(last_move)
+
+            # the leaves are scored ahead of the search, so the values do not change
+            for search in (MinimaxBot.ALPHA_BETA, MinimaxBot.PVS):
+                serial_bot = _CountingMinimaxBot(player, search=search)
+                batch_bot = BatchCountingBot(player, search=search, batch_leaves=True)
+                batch_bot.batches = 0
+                if search == MinimaxBot.PVS:
+                    expected = serial_bot._pvs(board, valid_moves, -float('inf'), float('inf'), 3)
+                    result = batch_bot._pvs(board, valid_moves, -float('inf'), float('inf'), 3)
+                else:
+                    expected = serial_bot._max(board, valid_moves, -float('inf'), float('inf'), 3)
+                    result = batch_bot._max(board, valid_moves, -float('inf'), float('inf'), 3)
+                self.assertEqual(result, expected)
+                self.assertGreater(batch_bot.batches, 0)
+                self.assertLess(batch_bot.batches, batch_bot.leaf_evaluations)
+
+    def test_parallel_search(self):
+        SearchPoolService.shutdown()  # fresh workers, whose transposition tables hold no deeper results
+        try:
+            for search in (MinimaxBot.ALPHA_BETA, MinimaxBot.PVS):
+                for name, moves, expected_counts in Perft.REFERENCE_POSITIONS[1:3]:
+                    board, last_move = Perft.setup_position(moves)
+                    valid_moves = board.get_valid_moves(last_move)
+                    serial_bot = _CountingMinimaxBot(board.next_player, search=search)
+                    parallel_bot = _CountingMinimaxBot(board.next_player, search=search, workers=2)
+                    if search == MinimaxBot.PVS:
+                        serial_value, serial_move = serial_bot._pvs(board, valid_moves, -float('inf'), float('inf'), 3)
+                    else:
+                        serial_value, serial_move = serial_bot._max(board, valid_moves, -float('inf'), float('inf'), 3)
+                    parallel_value, parallel_move = parallel_bot._parallel_root(board, valid_moves, 3, None)
+                    self.assertAlmostEqual(parallel_value, serial_value)
+                    self.assertIs(parallel_move, serial_move)
+
+            # once deeper searches have warmed the workers' tables, the scores may differ from a cold search, but the
+            # search still completes with a valid move and a score in range
+            board, last_move = Perft.setup_position(Perft.REFERENCE_POSITIONS[1][1])
+            valid_moves = board.get_valid_moves(last_move)
+            parallel_bot = _CountingMinimaxBot(board.next_player, workers=2)
+            parallel_bot._parallel_root(board, valid_moves, 4, None)
+            parallel_value, parallel_move = parallel_bot._parallel_root(board, valid_moves, 3, None)
+            self.assertIn(parallel_move, valid_moves)
+            self.assertLessEqual(abs(parallel_value), 1)
+        finally:
+            SearchPoolService.shutdown()
+
+    def test_worker_settings(self):
+        # a worker's copy of a tuned bot takes over its settings, which are sent to the worker process pickled
+        tuned_bot = _CountingMinimaxBot(Board.O, table_megabytes=1, replacement_policy=TranspositionTable.ALWAYS_REPLACE,
+                                        move_ordering=MoveOrdering(killers=False, static_score=MoveOrdering.cheap_score),
+                                        search=MinimaxBot.PVS, batch_leaves=True, workers=2)
+        settings = pickle.loads(pickle.dumps(tuned_bot.worker_settings()))
+        worker_bot = _CountingMinimaxBot(Board.O)
+        worker_bot.apply_worker_settings(settings)
+        self.assertEqual(worker_bot.worker_settings(), tuned_bot.worker_settings())
+        self.assertEqual(worker_bot.transposition_table.size, tuned_bot.transposition_table.size)
+        self.assertEqual(worker_bot.transposition_table.replacement_policy, TranspositionTable.ALWAYS_REPLACE)
+        self.assertIs(worker_bot.move_ordering.static_score, MoveOrdering.cheap_score)
+
+        # settings that did not change keep the warm table and move ordering
+        table, ordering = worker_bot.transposition_table, worker_bot.move_ordering
+        worker_bot.apply_worker_settings(settings)
+        self.assertIs(worker_bot.transposition_table, table)
+        self.assertIs(worker_bot.move_ordering, ordering)
+
+    def test_replacement_policy(self):
+        table = TranspositionTable(max_megabytes=0.001)
+        self.assertEqual(table.size, 4)
+        table.store(1, 5, TranspositionTable.EXACT, 0.5, None)
+        table.store(5, 2, TranspositionTable.EXACT, 0.1, None)  # same slot, shallower: kept out
+        self.assertEqual(table.probe(1).value, 0.5)
+        self.assertIsNone(table.probe(5))
+
+        table.new_search()
+        table.store(5, 2, TranspositionTable.EXACT, 0.1, None)  # entries from older searches are replaced
+        self.assertEqual(table.probe(5).value, 0.1)
+        self.assertIsNone(table.probe(1))
+
+        table = TranspositionTable(max_megabytes=0.001, replacement_policy=TranspositionTable.ALWAYS_REPLACE)
+        table.store(1, 5, TranspositionTable.EXACT, 0.5, None)
+        table.store(5, 2, TranspositionTable.LOWER_BOUND, 0.1, None)
+        self.assertEqual(table.probe(5).bound, TranspositionTable.LOWER_BOUND)
+
+
+class MonteCarloBotUnitTest(unittest.TestCase):
+    def test_tree_reuse(self):
+        bot = MonteCarloBot(Board.X, time_limit=0.3)
+        game = Game(bot, Player(Board.O))
+        move = bot.compute_next_move(game.board, game.get_valid_moves())
+        self.assertEqual(bot.reused_playouts, 0)
+        game.make_move(move)
+
+        # the opponent replies with the move the search explored the most
+        tree = bot._tree
+        reply = max(tree.children(tree.find_child(0, move)), key=lambda node: tree.visits[node])
+        game.make_move(tree.get_move(reply))
+        expected_playouts = tree.visits[reply]
+        self.assertIn(bot.compute_next_move(game.board, game.get_valid_moves()), game.get_valid_moves())
+        self.assertEqual(bot.reused_playouts, expected_playouts)
+        self.assertGreater(bot.reused_playouts, 0)
+
+        # a new game starts with a new tree
+        game = Game(bot, Player(Board.O))
+        bot.compute_next_move(game.board, game.get_valid_moves())
+        self.assertEqual(bot.reused_playouts, 0)
+
+    def test_parallel_search(self):
+        SearchPoolService.shutdown()
+        try:
+            bot = MonteCarloBot(Board.X, time_limit=0.3, workers=2)
+            game = Game(bot, Player(Board.O))
+            for i in range(0, 2):
+                move = bot.compute_next_move(game.board, game.get_valid_moves())
+                self.assertIn(move, game.get_valid_moves())
+                # each tree plays out at least one root move, even if starting the workers took the whole time limit
+                self.assertGreaterEqual(bot.playouts, 2)
+                game.make_move(move)
+                game.make_move(game.board.get_random_valid_move(move))
+
+            # the workers grow their trees with the bot's widening settings: each node gets a single child
+            bot = MonteCarloBot(Board.X, time_limit=0.3, workers=2, widening_constant=1, widening_exponent=0)
+            game = Game(bot, Player(Board.O))
+            root_moves = bot._parallel_search()
+            self.assertEqual(len(root_moves), 81)
+            self.assertLessEqual(len([visits for move, visits, wins, ties, proven in root_moves if visits > 0]), 2)
+        finally:
+            SearchPoolService.shutdown()
+
+    def test_batched_playouts(self):
+        bot = MonteCarloBot(Board.X, time_limit=0.2, playouts_per_expansion=8)
+        game = Game(bot, Player(Board.O))
+        self.assertIn(bot.compute_next_move(game.board, game.get_valid_moves()), game.get_valid_moves())
+
+        # every iteration records the results of 8 games along its whole path
+        tree = bot._tree
+        nodes = slice(0, tree.size)
+        self.assertGreater(bot.playouts, 0)
+        self.assertTrue(numpy.all(tree.visits[nodes] % 8 == 0))
+        self.assertTrue(numpy.all(tree.wins[nodes] + tree.ties[nodes] <= tree.visits[nodes]))
+        self.assertEqual(sum(tree.visits[child] for child in tree.children(0)), tree.visits[0] - 8)
+
+    def test_tree_arrays(self):
+        bot = MonteCarloBot(Board.X, time_limit=0.2)
+        game = Game(bot, Player(Board.O))
+        bot.compute_next_move(game.board, game.get_valid_moves())
+        tree = bot._tree
+        nodes = numpy.arange(1, tree.size)
+        self.assertGreater(tree.size, 81)
+
+        # every playout through a child also went through its parent
+        parents = tree.parent[nodes]
+        self.assertTrue(numpy.all(tree.visits[nodes] <= tree.visits[parents]))
+        self.assertTrue(numpy.all(tree.player[nodes] != tree.player[parents]))
+        for node in numpy.flatnonzero(tree.first_child[0:tree.size] >= 0):
+            # a node is played out once itself before it is expanded
+            self.assertEqual(sum(tree.visits[child] for child in tree.children(node)), tree.visits[node] - 1)
+            for child in tree.children(node):
+                self.assertEqual(tree.parent[child], node)
+
+        # a subtree copied to a new tree keeps its statistics and its shape
+        child = max(tree.children(0), key=lambda node: tree.child_count[node])
+        subtree = tree.extract(child)
+        self.assertEqual(subtree.visits[0], tree.visits[child])
+        self.assertEqual([subtree.get_move(node) for node in subtree.children(0)],
+                         [tree.get_move(node) for node in tree.children(child)])
+        self.assertEqual(subtree.parent[0], -1)
+
+    def test_progressive_widening(self):
+        bot = MonteCarloBot(Board.X, time_limit=0.2, widening_constant=2, widening_exponent=0.5)
+        game = Game(bot, Player(Board.O))
+        self.assertIn(bot.compute_next_move(game.board, game.get_valid_moves()), game.get_valid_moves())
+
+        # a node gets a new child only while it has fewer than 2 * sqrt(visits) of them
+        tree = bot._tree
+        self.assertEqual(len(tree.root_statistics()), 81)
+        for node in numpy.flatnonzero(tree.first_child[0:tree.size] >= 0):
+            self.assertLessEqual(tree.child_count[node], tree.move_count[node])
+            self.assertLessEqual(tree.child_count[node], max(1, 2 * tree.visits[node] ** 0.5 + 1))
+        self.assertLess(tree.child_count[0], 81)
+
+    def test_solver(self):
+        # O to move can force a win by playing abs index 40, which takes the search a few plies to prove
+        moves = (30, 20, 62, 17, 52, 58, 3, 19, 68, 42, 36, 47, 80, 70, 39, 28, 12, 45, 72, 54, 11, 53, 60, 1, 23, 79,
+                 57, 9, 27, 10, 41, 44, 43, 50, 78, 64, 49, 75, 56, 24, 55, 4, 13, 48, 65, 35, 25, 76, 67, 32, 16)
+        bot = MonteCarloBot(Board.O, time_limit=30)
+        game = Game(Player(Board.X), bot)
+        for i, abs_index in enumerate(moves):
+            game.make_move(Move.get(Board.X if i % 2 == 0 else Board.O, abs_index))
+
+        start_time = time.time()
+        move = bot.compute_next_move(game.board, game.get_valid_moves())
+        self.assertEqual(move.abs_index, 40)
+        # the search stops as soon as the root is proven
+        self.assertLess(time.time() - start_time, 30)
+        tree = bot._tree
+        self.assertEqual(tree.proven[0], 1)
+        self.assertEqual(tree.proven[tree.find_child(0, move)], -1)
+
 
 class PlayerUnitTest(unittest.TestCase):
     def test_init(self):
@@ -226,5 +816,37 @@ class GameUnitTest(unittest.TestCase):
         self.assertTrue(game.is_game_over())
         self.assertEqual(game.get_winner(), Board.EMPTY)
 
+    def test_replay(self):
+        rng = random.Random(11)
+        game = Game(Player(Board.X), Player(Board.O), snapshot_interval=7)
+        boards = [GlobalBoard().to_bytes()]
+        while not game.is_game_over():
+            game.make_move(game.board.get_random_valid_move(game.moves[-1] if game.moves else None, rng))
+            boards.append(game.board.to_bytes())
+
+        # seeking uses the snapshots, so every position must match the one recorded while playing
+        for ply in range(0, len(game.moves) + 1):
+            self.assertEqual(game.get_position(ply).to_bytes(), boards[ply])
+        self.assertRaises(Exception, game.get_position, len(game.moves) + 1)
+
+        steps = list((ply, move, board.to_bytes()) for ply, move, board in game.replay(start=3))
+        self.assertEqual(len(steps), len(game.moves) - 3)
+        for ply, move, encoded in steps:
+            self.assertIs(move, game.moves[ply - 1])
+            self.assertEqual(encoded, boards[ply])
+
+    def test_board_rows(self):
+        rng = random.Random(12)
+        game = Game(Player(Board.X), Player(Board.O))
+        while not game.is_game_over():
+            game.make_move(game.board.get_random_valid_move(game.moves[-1] if game.moves else None, rng))
+
+        # the incrementally canonicalized rows match the keys BoardDataModel builds from scratch
+        rows = GameDataModel(game)._board_rows()
+        self.assertEqual(len(rows), len(game.moves))
+        for ply, move, board in game.replay():
+            board_data = BoardDataModel(board)
+            self.assertEqual(rows[ply - 1], tuple(board_data.canonical_representation) + (board_data.next_player,))
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
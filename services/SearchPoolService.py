@@ -0,0 +1,100 @@
+"""
+This service keeps the pools of worker processes used by parallel bot searches (MinimaxBot and MonteCarloBot with
+workers > 0)
+
+Pools are created on first use and stay alive across moves and games, so every worker loads the JVM and the Weka model
+of a bot only once.  Workers build their own bot objects (one per bot class, player and slot, see _get_worker_bot),
+which also keeps their transposition tables warm from one move to the next.  The pool does not pin a slot to a
+process, so the search tree of a MonteCarloBot slot is only reused when the slot's next task happens to run in the same
+process.  main.py shuts the pools down when the application exits.
+
+This module is deliberately free of imports from the models package: worker processes import it first, and the JVM
+has to be running before models.game (which loads the Weka datasets) can be imported.
+"""
+
+import sys
+import importlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+_pools = {}  # maps a worker count to its ProcessPoolExecutor
+_worker_bots = {}  # in a worker process, maps (bot class path, player, slot) to the bot object used for searching
+
+
+def get_pool(workers):
+    """
+    Gets the pool with the given number of worker processes, creating it if needed
+    :param workers: the number of worker processes
+    :return: a concurrent.futures.ProcessPoolExecutor
+    """
+    if workers not in _pools:
+        if sys.version_info >= (3, 7):
+            # forked workers would inherit a copy of the parent's JVM, which does not survive a fork
+            _pools[workers] = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'))
+        else:
+            _pools[workers] = ProcessPoolExecutor(workers)
+    return _pools[workers]
+
+
+def shutdown():
+    """
+    Stops every worker process.  Pools are recreated if they are needed again
+    :return: None
+    """
+    for pool in _pools.values():
+        pool.shutdown(wait=False)
+    _pools.clear()
+
+
+def _get_worker_bot(bot_class_path, player, slot=0):
+    # slot tells apart the bots of searches that run several tasks at once, like the trees of a parallel MCTS search
+    key = (bot_class_path, player, slot)
+    if key not in _worker_bots:
+        import weka.core.jvm as jvm
+        if not jvm.started:
+            jvm.start()
+        module_name, class_name = bot_class_path.rsplit('.', 1)
+        bot_class = getattr(importlib.import_module(module_name), class_name)
+        _worker_bots[key] = bot_class(player)
+    return _worker_bots[key]
+
+
+def search_root_move(bot_class_path, player, settings, encoded_board, move_index, depth, alpha, time_left):
+    """
+    Runs in a worker process: searches one root move of a parallel MinimaxBot search
+    :param bot_class_path: the module and class name of the searching bot, e.g. 'models.game.bots.MinimaxBot.MinimaxBot'
+    :param player: the player the bot plays as
+    :param settings: the searching bot's settings, see MinimaxBot.worker_settings
+    :param encoded_board: the root position, encoded with GlobalBoard.to_bytes
+    :param move_index: the abs_index of the root move to search
+    :param depth: the depth of the search, counting the root move
+    :param alpha: the best score found for the root so far
+    :param time_left: the number of seconds before the search must be abandoned, or None
+    :return: see MinimaxBot.search_root_move
+    """
+    bot = _get_worker_bot(bot_class_path, player)
+    from models.game import GlobalBoard, Move
+    bot.apply_worker_settings(settings)
+    board = GlobalBoard.from_bytes(encoded_board)
+    return bot.search_root_move(board, Move.get(player, move_index), depth, alpha, time_left)
+
+
+def search_position(bot_class_path, player, slot, settings, moves, deadline, seed):
+    """
+    Runs in a worker process: grows one of the trees of a parallel MonteCarloBot search
+    :param bot_class_path: the module and class name of the searching bot
+    :param player: the player the bot plays as
+    :param slot: the number of the tree.  Each slot has its own bot, so that its tree can be reused on the next move
+    :param settings: the searching bot's settings, see MonteCarloBot.worker_settings
+    :param moves: list of hash() values of the moves played so far
+    :param deadline: the time.time() at which the search stops
+    :param seed: seed for the random playouts of the tree
+    :return: see MonteCarloBot.search_position
+    """
+    # the bots this process keeps for other slots hold trees of earlier positions, which the slots have likely grown
+    # in other processes since then.  They are released, so that each process keeps at most one tree
+    for key in [key for key in _worker_bots if key[0:2] == (bot_class_path, player) and key[2] != slot]:
+        del _worker_bots[key]
+    bot = _get_worker_bot(bot_class_path, player, slot)
+    bot.apply_worker_settings(settings)
+    return bot.search_position(moves, deadline, seed)